@@ -5,5 +5,25 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 if __name__ == "__main__":
-    from src.main import main
-    main()
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "scrape"
+    if command == "serve-browser":
+        from src.browser_server import serve
+        serve()
+    elif command == "reextract":
+        # python run.py reextract [archive_dir]
+        from src.reextract import reextract
+        reextract(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif command == "keywords":
+        # python run.py keywords <reviews.csv> [places.csv]
+        from src.keyword_extractor import fill_review_keywords
+        fill_review_keywords(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    elif command == "denormalize":
+        # python run.py denormalize <places.csv> <reviews.csv>
+        from src.data_processor import DataProcessor
+        DataProcessor(os.getenv("OUTPUT_FOLDER", "output_data")).denormalize_files(sys.argv[2], sys.argv[3])
+    else:
+        from src.main import main
+        main()
@@ -1,77 +1,225 @@
 import random
+import time
 from playwright.sync_api import sync_playwright
-from fake_useragent import UserAgent
 import os
 from src.logger_handler import setup_logger
+from src.storage_state_pool import StorageStatePool
+from src.utils import load_json, save_json
 
 logger = setup_logger()
 
+# Anti-detection args shared by launched browsers and the browser server
+BASE_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-infobars",
+    "--window-position=0,0",
+    "--ignore-certifcate-errors",
+    "--ignore-certifcate-errors-spki-list"
+]
+
+# BROWSER_PROFILE=low_memory: fewer processes, capped V8 heap and caches
+LOW_MEMORY_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-features=Translate,BackForwardCache,MediaRouter,OptimizationHints",
+    "--renderer-process-limit=2",
+    "--process-per-site",
+    "--js-flags=--max-old-space-size=256",
+    "--disk-cache-size=33554432",
+    "--media-cache-size=1",
+    "--aggressive-cache-discard",
+    # Images are not needed for extraction (featured_image only reads the src attribute). A flag rather than
+    # context.route: routing disables the HTTP cache and stalls requests while the sync API sleeps.
+    "--blink-settings=imagesEnabled=false"
+]
+
+LOW_MEMORY_VIEWPORT = {'width': 1024, 'height': 700}
+
+class UserAgentPool:
+    """User-agent pool cached on disk so fake_useragent is only loaded when the cache is missing."""
+    def __init__(self, cache_file=None, size=None):
+        self.cache_file = cache_file or os.getenv("UA_CACHE_FILE", "cache/user_agents.json")
+        self.size = size or int(os.getenv("UA_POOL_SIZE", "50"))
+        self.agents = self._load()
+
+    def _load(self):
+        return load_json(self.cache_file, None, "UA cache") or self.rebuild()
+
+    def rebuild(self):
+        """Samples a fresh pool from fake_useragent and writes it to the cache file."""
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        agents = list({ua.random for _ in range(self.size * 2)})[:self.size]
+        if save_json(self.cache_file, agents, "UA cache"):
+            logger.info(f"UA pool of {len(agents)} agents cached to {self.cache_file}")
+        return agents
+
+    @property
+    def random(self):
+        return random.choice(self.agents)
+
 class BrowserManager:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, cdp_url=None, profile=None):
         self.headless = headless
-        self.ua = UserAgent()
+        # Attach to a long-lived browser (see src/browser_server.py) instead of launching one
+        self.cdp_url = cdp_url if cdp_url is not None else os.getenv("BROWSER_CDP_URL", "")
+        self.profile = (profile or os.getenv("BROWSER_PROFILE", "default")).lower()
+        # Recycle the context/browser once its processes exceed these budgets (0 disables)
+        self.rss_budget_mb = float(os.getenv("WORKER_RSS_BUDGET_MB", "0"))
+        self.renderer_rss_budget_mb = float(os.getenv("RENDERER_RSS_BUDGET_MB", "0"))
+        self.ua = UserAgentPool()
+        # Saved cookies/localStorage so new contexts skip consent and Maps warm-up
+        self.state_pool = StorageStatePool()
+        self.pw = None
         self.browser = None
         self.context = None
         self.page = None
+        # Created ahead of a context switch so the prefetcher can load the next place in it
+        self.next_context = None
+        self.next_viewport = None
+
+    @property
+    def low_memory(self):
+        return self.profile == "low_memory"
+
+    def _new_context(self):
+        """Creates a context and page with the profile's viewport and the stealth init script."""
+        self.context, viewport = self._create_context()
+        self.page = self.new_page()
+        return viewport
+
+    def _create_context(self):
+        """Returns (context, viewport) without making it the current context."""
+        if self.low_memory:
+            viewport = dict(LOW_MEMORY_VIEWPORT)
+        else:
+            # Context randomization
+            viewport = {'width': random.randint(1280, 1920), 'height': random.randint(720, 1080)}
+        
+        context = self.browser.new_context(
+            viewport=viewport,
+            user_agent=self.ua.random,
+            storage_state=self.state_pool.pick()
+        )
+        return context, viewport
+
+    def prepare_next_context(self):
+        """Creates the context the next get_new_context() switches to, so a tab can be preloaded in it."""
+        if not self.next_context:
+            self.next_context, self.next_viewport = self._create_context()
+        return self.next_context
+
+    def new_page(self, context=None):
+        """Opens an extra page in the current (or given) context with the stealth init script."""
+        page = (context or self.context).new_page()
+        
+        # Hide automation traces
+        page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return page
 
     def start_browser(self):
-        """Starts a fresh browser instance with anti-detection args."""
+        """Starts a fresh browser instance with anti-detection args, or attaches to a running one."""
         try:
-            pw = sync_playwright().start()
-            self.browser = pw.chromium.launch(
-                headless=self.headless,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-infobars",
-                    "--window-position=0,0",
-                    "--ignore-certifcate-errors",
-                    "--ignore-certifcate-errors-spki-list",
-                    "--user-agent=" + self.ua.random
-                ]
-            )
-            
-            # Context randomization
-            viewport_width = random.randint(1280, 1920)
-            viewport_height = random.randint(720, 1080)
-            
-            self.context = self.browser.new_context(
-                viewport={'width': viewport_width, 'height': viewport_height},
-                user_agent=self.ua.random
-            )
-            
-            # Initial stealth scripts could be added here if needed
-            self.page = self.context.new_page()
+            started = time.perf_counter()
+            self.pw = sync_playwright().start()
+            if self.cdp_url:
+                self.browser = self.pw.chromium.connect_over_cdp(self.cdp_url)
+                logger.info(f"Attached to browser server at {self.cdp_url}")
+            else:
+                args = BASE_ARGS + (LOW_MEMORY_ARGS if self.low_memory else [])
+                self.browser = self.pw.chromium.launch(
+                    headless=self.headless,
+                    args=args + ["--user-agent=" + self.ua.random]
+                )
             
-            # Hide automation traces
-            self.page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            viewport = self._new_context()
             
-            logger.info(f"Browser started successfully. Viewport: {viewport_width}x{viewport_height}")
+            logger.info(f"Browser started successfully in {time.perf_counter() - started:.2f}s. Profile: {self.profile}, viewport: {viewport['width']}x{viewport['height']}")
             return self.page
         except Exception as e:
             logger.error(f"Failed to start browser: {e}")
             raise
 
     def close_browser(self):
-        """Closes the browser instance."""
+        """Closes the browser instance (or only disconnects from an attached browser server)."""
+        if self.next_context:
+            try:
+                self.next_context.close()
+            except Exception:
+                pass
+            self.next_context = None
         if self.browser:
+            self.state_pool.harvest(self.context)
+            if self.cdp_url and self.context:
+                # Leave the shared server running, only drop our own context
+                self.context.close()
             self.browser.close()
-            logger.info("Browser closed.")
+            logger.info("Browser disconnected." if self.cdp_url else "Browser closed.")
+            self.browser = None
+        if self.pw:
+            self.pw.stop()
+            self.pw = None
 
     def get_new_context(self):
         """Creates a fresh context to clear session data."""
         if self.context:
+            self.state_pool.harvest(self.context)
             self.context.close()
         
-        viewport_width = random.randint(1280, 1920)
-        viewport_height = random.randint(720, 1080)
+        if self.next_context:
+            # Already created (and possibly holding a prefetched tab) by prepare_next_context()
+            self.context, viewport = self.next_context, self.next_viewport
+            self.next_context = None
+            self.page = self.new_page()
+        else:
+            viewport = self._new_context()
+        logger.info(f"Fresh context created. Viewport: {viewport['width']}x{viewport['height']}")
+        return self.page
+
+    def memory_usage(self):
+        """Returns (total_rss_mb, largest_renderer_rss_mb) of the Chromium processes spawned by this worker."""
+        import psutil
+        total = 0.0
+        largest_renderer = 0.0
+        for proc in psutil.Process(os.getpid()).children(recursive=True):
+            try:
+                name = proc.name().lower()
+                if "chrom" not in name and "headless_shell" not in name:
+                    continue
+                rss = proc.memory_info().rss / (1024 * 1024)
+                total += rss
+                if "--type=renderer" in proc.cmdline():
+                    largest_renderer = max(largest_renderer, rss)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total, largest_renderer
+
+    def recycle_if_needed(self):
+        """Recycles the context (or the whole browser) when over the RSS budget. Returns the new page, or None."""
+        if not (self.rss_budget_mb or self.renderer_rss_budget_mb) or self.cdp_url:
+            # Processes of an attached browser server are not children of this worker
+            return None
         
-        self.context = self.browser.new_context(
-            viewport={'width': viewport_width, 'height': viewport_height},
-            user_agent=self.ua.random
-        )
-        self.page = self.context.new_page()
-        self.page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        logger.info(f"Fresh context created. Viewport: {viewport_width}x{viewport_height}")
+        total, renderer = self.memory_usage()
+        over_total = self.rss_budget_mb and total > self.rss_budget_mb
+        over_renderer = self.renderer_rss_budget_mb and renderer > self.renderer_rss_budget_mb
+        if not (over_total or over_renderer):
+            logger.debug("Browser RSS %.0f MB (largest renderer %.0f MB) within budget.", total, renderer)
+            return None
+        
+        logger.info(f"Browser RSS {total:.0f} MB (largest renderer {renderer:.0f} MB) over budget; recycling context.")
+        self.get_new_context()
+        
+        total, renderer = self.memory_usage()
+        still_over_total = self.rss_budget_mb and total > self.rss_budget_mb
+        still_over_renderer = self.renderer_rss_budget_mb and renderer > self.renderer_rss_budget_mb
+        if still_over_total or still_over_renderer:
+            logger.info(f"Browser RSS still {total:.0f} MB (largest renderer {renderer:.0f} MB) after context recycle; restarting browser.")
+            self.close_browser()
+            self.start_browser()
         return self.page
@@ -0,0 +1,37 @@
+import os
+import time
+from playwright.sync_api import sync_playwright
+from src.browser_manager import UserAgentPool, BASE_ARGS, LOW_MEMORY_ARGS
+from src.logger_handler import setup_logger
+
+logger = setup_logger()
+
+def serve(port=None, headless=None):
+    """Launches a long-lived Chromium exposing a CDP endpoint that scraper runs attach to via BROWSER_CDP_URL."""
+    port = port or int(os.getenv("BROWSER_SERVER_PORT", "9222"))
+    if headless is None:
+        headless = os.getenv("HEADLESS", "true").lower() == "true"
+    ua = UserAgentPool()
+
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(
+            headless=headless,
+            args=[
+                f"--remote-debugging-port={port}",
+                "--remote-debugging-address=127.0.0.1"
+            ] + BASE_ARGS + (LOW_MEMORY_ARGS if os.getenv("BROWSER_PROFILE", "default").lower() == "low_memory" else []) + ["--user-agent=" + ua.random]
+        )
+        logger.info(f"Browser server listening. Set BROWSER_CDP_URL=http://127.0.0.1:{port} to attach.")
+        try:
+            while browser.is_connected():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info("Stopping browser server.")
+        finally:
+            if browser.is_connected():
+                browser.close()
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    serve()
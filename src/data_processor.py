@@ -6,6 +6,31 @@ from src.logger_handler import setup_logger
 
 logger = setup_logger()
 
+class ReviewRecord:
+    """Slim review row; place-level fields live in the places table and are joined via place_id."""
+    __slots__ = (
+        'place_id', 'review_id', 'review_rating', 'author_name', 'tanggal_review',
+        'isi_review', 'balasan_pemilik', 'tanggal_balasan', 'ingestion_time'
+    )
+
+    def __init__(self, place_id, review_id, review_rating, author_name, tanggal_review,
+                 isi_review, balasan_pemilik, tanggal_balasan, ingestion_time):
+        self.place_id = place_id
+        self.review_id = review_id
+        self.review_rating = review_rating
+        self.author_name = author_name
+        self.tanggal_review = tanggal_review
+        self.isi_review = isi_review
+        self.balasan_pemilik = balasan_pemilik
+        self.tanggal_balasan = tanggal_balasan
+        self.ingestion_time = ingestion_time
+
+    def to_tuple(self):
+        return tuple(getattr(self, f) for f in self.__slots__)
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.__slots__}
+
 class DataProcessor:
     def __init__(self, output_folder="output_data"):
         self.output_folder = output_folder
@@ -13,58 +38,98 @@ class DataProcessor:
             os.makedirs(output_folder)
         self.session_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    def process_reviews(self, raw_reviews, place_details=None):
-        """Cleans and formats review data."""
-        if place_details is None:
-            place_details = {}
-            
-        processed = []
+    def session_path(self, name_prefix):
+        """Output CSV path for this session."""
+        return os.path.join(self.output_folder, f"{name_prefix}_{self.session_timestamp}.csv")
+
+    def build_place_row(self, place_details):
+        """Place-level fields, written once per place in normalized mode."""
+        return {
+            'place_id': place_details.get('place_id') or place_details.get('place_url'),
+            'place_url': place_details.get('place_url'),
+            'nama_tempat': place_details.get('nama_tempat'),
+            'latitude': place_details.get('latitude'),
+            'longitude': place_details.get('longitude'),
+            'description': place_details.get('description'),
+            'is_spending': place_details.get('is_spending'),
+            'reviews': place_details.get('ulasan_total'),
+            'competitors': place_details.get('competitors'),
+            'website': place_details.get('website'),
+            'can_claim': place_details.get('can_claim'),
+            'owner': place_details.get('owner'),
+            'featured_image': place_details.get('featured_image'),
+            'featured_image_path': place_details.get('featured_image_path'),
+            'featured_image_width': place_details.get('featured_image_width'),
+            'featured_image_height': place_details.get('featured_image_height'),
+            'main_category': place_details.get('main_category'),
+            'categories': place_details.get('categories'),
+            'total_rating': place_details.get('rating_total'),
+            'total_reviews': place_details.get('ulasan_total'),
+            'workday_timing': place_details.get('workday_timing'),
+            'is_temporarily_closed': place_details.get('is_temporarily_closed'),
+            'is_permanently_closed': place_details.get('is_permanently_closed'),
+            'closed_on': place_details.get('closed_on'),
+            'phone': place_details.get('telepon'),
+            'address': place_details.get('alamat'),
+            'review_keywords': place_details.get('review_keywords'),
+            'ingestion_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def process_review_records(self, raw_reviews, place_id=None, reference_time=None):
+        """Cleans review data into compact ReviewRecords keyed by place_id.
+
+        reference_time is when the reviews were scraped (relative dates resolve against it); defaults to now.
+        """
+        ingestion_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        records = []
         for review in raw_reviews:
             # Parse date
-            parsed_date = parse_relative_date(review.get('tanggal_raw'))
+            parsed_date = parse_relative_date(review.get('tanggal_raw'), reference_time)
             
             # Filter by date (April 2025 onwards)
             if parsed_date and parsed_date < "2025-04-01":
                 continue
                 
-            row = {
-                'place_id': review.get('place_id'),
-                'place_url': review.get('place_url'),
-                'nama_tempat': review.get('nama_tempat'),
-                'latitude': place_details.get('latitude'),
-                'longitude': place_details.get('longitude'),
-                'description': place_details.get('description'),
-                'is_spending': place_details.get('is_spending'),
-                'reviews': place_details.get('ulasan_total'),
-                'competitors': place_details.get('competitors'),
-                'website': place_details.get('website'),
-                'can_claim': place_details.get('can_claim'),
-                'owner': place_details.get('owner'),
-                'featured_image': place_details.get('featured_image'),
-                'main_category': place_details.get('main_category'),
-                'categories': place_details.get('categories'),
-                'total_rating': place_details.get('rating_total'),
-                'total_reviews': place_details.get('ulasan_total'),
-                'review_rating': review.get('rating_ulasan'),
-                'workday_timing': place_details.get('workday_timing'),
-                'is_temporarily_closed': place_details.get('is_temporarily_closed'),
-                'is_permanently_closed': place_details.get('is_permanently_closed'),
-                'closed_on': place_details.get('closed_on'),
-                'phone': place_details.get('telepon'),
-                'address': place_details.get('alamat'),
-                'review_keywords': place_details.get('review_keywords'),
-                'author_name': review.get('author_name', '').strip(),
-                'tanggal_review': parsed_date,
-                'isi_review': review.get('isi_review', '').strip(),
-                'balasan_pemilik': review.get('balasan_pemilik', '').strip(),
-                'tanggal_balasan': parse_relative_date(review.get('tanggal_balasan_raw')),
-                'review_id': review.get('review_id'),
-                'ingestion_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+            records.append(ReviewRecord(
+                place_id or review.get('place_id') or review.get('place_url'),
+                review.get('review_id'),
+                review.get('rating_ulasan'),
+                (review.get('author_name') or '').strip(),
+                parsed_date,
+                (review.get('isi_review') or '').strip(),
+                (review.get('balasan_pemilik') or '').strip(),
+                parse_relative_date(review.get('tanggal_balasan_raw'), reference_time),
+                ingestion_time
+            ))
             
-            processed.append(row)
+        return records
+
+    def process_reviews_normalized(self, raw_reviews, place_details=None, reference_time=None):
+        """Returns (place_row, review_records) without copying place fields onto each review."""
+        place_row = self.build_place_row(place_details or {})
+        return place_row, self.process_review_records(raw_reviews, place_row['place_id'], reference_time)
+
+    def denormalize(self, place_rows, review_records):
+        """Joins place rows back onto review records, producing the legacy one-row-per-review layout."""
+        places = {row['place_id']: row for row in place_rows}
+        rows = []
+        for record in review_records:
+            row = dict(places.get(record.place_id, {'place_id': record.place_id}))
+            row.update(record.to_dict())
+            rows.append(row)
+        return rows
+
+    def process_reviews(self, raw_reviews, place_details=None, reference_time=None):
+        """Cleans and formats review data."""
+        if place_details is None:
+            place_details = {}
             
-        return processed
+        place_row, records = self.process_reviews_normalized(raw_reviews, place_details, reference_time)
+        # Legacy rows carry the scraped place_id as-is (possibly empty)
+        place_row['place_id'] = place_details.get('place_id')
+        for record in records:
+            record.place_id = place_row['place_id']
+        return self.denormalize([place_row], records)
 
     def export_to_csv(self, data, name_prefix="gmaps_scrape", mode="a"):
         """Exports data to a CSV file."""
@@ -72,14 +137,14 @@ class DataProcessor:
             logger.warning("No data to export.")
             return None
             
-        filename = f"{name_prefix}_{self.session_timestamp}.csv"
-        filepath = os.path.join(self.output_folder, filename)
+        filepath = self.session_path(name_prefix)
         
         df = pd.DataFrame(data)
         # Ensure correct column order
         cols = [
             'place_id', 'place_url', 'nama_tempat', 'latitude', 'longitude', 'address', 'description', 'is_spending',
             'reviews', 'total_reviews', 'competitors', 'website', 'can_claim', 'owner', 'featured_image',
+            'featured_image_path', 'featured_image_width', 'featured_image_height',
             'main_category', 'categories', 'total_rating', 'review_rating', 'workday_timing', 'is_temporarily_closed',
             'is_permanently_closed', 'closed_on', 'phone', 'review_id', 'review_keywords',
             'author_name', 'tanggal_review', 'isi_review', 'balasan_pemilik', 'tanggal_balasan', 'ingestion_time'
@@ -94,6 +159,32 @@ class DataProcessor:
         logger.info(f"Data exported to {filepath}")
         return filepath
 
+    def export_normalized(self, place_row, review_records, name_prefix="gmaps_scrape"):
+        """Appends one place row to the places table and its reviews to the reviews table."""
+        places_path = self.session_path(f"{name_prefix}_places")
+        reviews_path = self.session_path(f"{name_prefix}_reviews")
+        
+        df_place = pd.DataFrame([place_row])
+        df_place.to_csv(places_path, index=False, mode='a', header=not os.path.exists(places_path), encoding='utf-8-sig')
+        
+        if review_records:
+            df_reviews = pd.DataFrame.from_records([r.to_tuple() for r in review_records], columns=ReviewRecord.__slots__)
+            df_reviews.to_csv(reviews_path, index=False, mode='a', header=not os.path.exists(reviews_path), encoding='utf-8-sig')
+        
+        logger.info(f"Place and {len(review_records)} reviews exported to {places_path} / {reviews_path}")
+        return places_path, reviews_path
+
+    def denormalize_files(self, places_path, reviews_path, name_prefix="gmaps_scrape_denormalized"):
+        """Builds the legacy denormalized CSV from a normalized places/reviews pair."""
+        # Read as text so values like phone '0812345' survive the round trip unchanged
+        df_places = pd.read_csv(places_path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        df_reviews = pd.read_csv(reviews_path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        # A place revisited in the same session is appended again; keep its latest row only
+        df_places = df_places.drop_duplicates(subset='place_id', keep='last')
+        # Place-level ingestion_time is superseded by the review's own
+        df = df_reviews.merge(df_places.drop(columns=['ingestion_time'], errors='ignore'), on='place_id', how='left')
+        return self.export_to_csv(df.to_dict('records'), name_prefix=name_prefix, mode='w')
+
     def export_errors(self, errors):
         """Exports errors to a separate CSV."""
         if not errors:
@@ -107,3 +198,16 @@ class DataProcessor:
         df.to_csv(filepath, index=False, encoding='utf-8-sig')
         logger.info(f"Error report exported to {filepath}")
         return filepath
+
+    def export_run_status(self, statuses):
+        """Exports the per-place outcome (scraped / unchanged / not_found / error) of this run."""
+        if not statuses:
+            return None
+            
+        filename = f"run_status_{self.session_timestamp}.csv"
+        filepath = os.path.join(self.output_folder, filename)
+        
+        df = pd.DataFrame(statuses)
+        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        logger.info(f"Run status exported to {filepath}")
+        return filepath
@@ -0,0 +1,84 @@
+import os
+import queue
+import threading
+from src.logger_handler import setup_logger, log_context
+
+logger = setup_logger()
+
+_STOP = object()
+
+class ExportPipeline:
+    """Processes and exports scraped review batches on a background thread so the browser never waits on pandas or disk."""
+    def __init__(self, processor, output_mode="denormalized", maxsize=None, archive=None):
+        self.processor = processor
+        self.output_mode = output_mode
+        # Optional RawArchive; the gzip write happens here rather than on the scrape thread
+        self.archive = archive
+        # Bounded: a scraper that outpaces the exporter blocks on submit() instead of piling batches up in memory
+        self.queue = queue.Queue(maxsize=maxsize or int(os.getenv("EXPORT_QUEUE_SIZE", "8")))
+        self.failures = []
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="export", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, place_name, raw_reviews, details, image_future=None, on_done=None, raw_html=None):
+        """Queues one place's raw reviews for processing/export; blocks while the queue is full.
+
+        on_done(ok) is called on the export thread once the batch is written (ok=True) or has failed.
+        raw_html is (detail_html, review_html, captured_at) for the raw archive, or None.
+        """
+        self.queue.put((place_name, raw_reviews, details, image_future, on_done, raw_html))
+
+    def _export(self, place_name, raw_reviews, details, image_future=None, raw_html=None):
+        if raw_html and self.archive:
+            self.archive.save(place_name, details, *raw_html)
+        if image_future:
+            # Downloaded while the reviews were scrolling; a failed image never blocks the export
+            try:
+                details.update(image_future.result(timeout=60))
+            except Exception as e:
+                logger.warning(f"Featured image download failed for {place_name}: {e}")
+        if self.output_mode == "normalized":
+            place_row, processed_reviews = self.processor.process_reviews_normalized(raw_reviews, details)
+            self.processor.export_normalized(place_row, processed_reviews)
+        else:
+            processed_reviews = self.processor.process_reviews(raw_reviews, details)
+            
+            # Write progressively to clear memory and secure data
+            self.processor.export_to_csv(processed_reviews)
+        logger.info(f"Successfully exported {len(processed_reviews)} reviews for {place_name}.")
+
+    def _run(self):
+        log_context(worker="export", stage="export")
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                self.queue.task_done()
+                return
+            place_name, raw_reviews, details, image_future, on_done, raw_html = item
+            log_context(place=place_name)
+            try:
+                self._export(place_name, raw_reviews, details, image_future, raw_html)
+                ok = True
+            except Exception as e:
+                # An export failure is recorded, never propagated into the scrape loop
+                logger.error(f"Export failed for {place_name}: {e}")
+                self.failures.append({"place_name": place_name, "error": f"Export failed: {e}"})
+                ok = False
+            try:
+                if on_done:
+                    on_done(ok)
+            except Exception as e:
+                logger.warning(f"Export callback failed for {place_name}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """Flushes every queued batch and stops the export thread."""
+        if self._thread and self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
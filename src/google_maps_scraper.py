@@ -2,15 +2,111 @@ import time
 import random
 import os
 import re
-from src.utils import random_delay, load_selectors, extract_place_id_from_url, extract_lat_long_from_url
+from src.utils import random_delay, load_selectors, extract_place_id_from_url, extract_lat_long_from_url, is_place_url
 from src.logger_handler import setup_logger
+from src.selector_resolver import SelectorResolver
 
 logger = setup_logger()
 
+# In-page scroll driver: scrolls the review feed, clicks 'Ulasan lainnya' when shown and watches item
+# growth with a MutationObserver. Resolves once on target count, end of feed, stall or timeout so a
+# whole place costs a single CDP round trip.
+SCROLL_DRIVER_JS = """
+async (container, opts) => {
+    const count = () => document.querySelectorAll(opts.itemSelector).length;
+    const sleep = ms => new Promise(r => setTimeout(r, ms));
+    const started = performance.now();
+    let lastCount = count();
+    let lastGrowth = started;
+    let onGrowth = null;
+    let scrolls = 0;
+    let clicks = 0;
+    let reason = 'max_scrolls';
+
+    const observer = new MutationObserver(() => {
+        const c = count();
+        if (c !== lastCount) {
+            lastCount = c;
+            lastGrowth = performance.now();
+            if (onGrowth) onGrowth();
+        }
+    });
+    observer.observe(container, {childList: true, subtree: true});
+    const waitForGrowth = ms => new Promise(resolve => { onGrowth = resolve; setTimeout(resolve, ms); });
+
+    try {
+        while (scrolls < opts.maxScrolls) {
+            if (opts.target > 0 && lastCount >= opts.target) { reason = 'target'; break; }
+            if (performance.now() - started > opts.timeoutMs) { reason = 'timeout'; break; }
+
+            const more = document.querySelector(opts.moreSelector);
+            if (more && more.offsetParent !== null) { more.click(); clicks++; }
+
+            container.scrollBy(0, 5000);
+            const items = document.querySelectorAll(opts.itemSelector);
+            if (items.length) items[items.length - 1].scrollIntoView({block: 'end'});
+            scrolls++;
+
+            await waitForGrowth(opts.stallMs);
+            onGrowth = null;
+            // Human-like pause between scrolls
+            await sleep(opts.minPauseMs + Math.random() * (opts.maxPauseMs - opts.minPauseMs));
+
+            if (performance.now() - lastGrowth > opts.stallMs) {
+                const atBottom = container.scrollTop + container.clientHeight >= container.scrollHeight - 2;
+                reason = atBottom ? 'end' : 'stall';
+                break;
+            }
+        }
+    } finally {
+        observer.disconnect();
+    }
+    return {count: count(), reason: reason, scrolls: scrolls, clicks: clicks, elapsedMs: Math.round(performance.now() - started)};
+}
+"""
+
 class GoogleMapsScraper:
-    def __init__(self, page):
+    def __init__(self, page, resolver=None, capture_raw=False):
         self.page = page
         self.selectors = load_selectors()
+        self.resolver = resolver or SelectorResolver()
+        # Read once; these used to be re-read from the environment on every scroll
+        self.max_reviews = int(os.getenv("MAX_REVIEWS", "100"))
+        self.max_scrolls = int(os.getenv("SCROLL_RETRY", "5")) * 10
+        self.scroll_stall_ms = int(os.getenv("SCROLL_STALL_MS", "4000"))
+        self.scroll_timeout_ms = int(os.getenv("SCROLL_TIMEOUT_S", "600")) * 1000
+        # Error swallowed by the last scrape_reviews call, if any
+        self.last_error = None
+        # When set, the detail panel and review item HTML are kept for the raw archive
+        self.capture_raw = capture_raw
+        self.raw_detail_html = None
+        self.raw_review_html = []
+
+    def handle_consent(self):
+        """Accepts Google's consent interstitial if the page landed on it. Returns True when one was handled."""
+        # Cheap URL/DOM check first so normal navigations pay a single round trip
+        if "consent.google." not in self.page.url and self.page.locator("form[action*='consent.google']").count() == 0:
+            return False
+        
+        accept_btn, variant = self.resolver.resolve(self.page, 'consent.accept', [
+            "button[aria-label='Terima semua']",
+            "button:has-text('Terima semua')",
+            "button[aria-label='Accept all']",
+            "button:has-text('Accept all')"
+        ], visible=True, required=True, fallbacks=["form[action*='consent.google'] button"])
+        if not accept_btn:
+            logger.warning("Consent page detected but no accept button found.")
+            return False
+        
+        logger.info(f"Accepting consent page using selector: {variant}")
+        accept_btn.first.click()
+        try:
+            # Consent redirects back to the URL that was originally requested
+            self.page.wait_for_url(lambda url: "consent.google." not in url, timeout=10000)
+            self.page.wait_for_load_state("domcontentloaded")
+        except Exception:
+            logger.warning("Still on the consent page after accepting.")
+        return True
 
     def search_place(self, name):
         """Searches for a place and navigates to its details."""
@@ -25,24 +121,46 @@ class GoogleMapsScraper:
             
             # Wait for search results or direct redirect
             self.page.wait_for_load_state("networkidle")
-            
-            # Use a loop to wait for either results or detail page
-            for _ in range(5):
-                if self.page.locator(self.selectors['search']['recommendation_item']).count() > 0:
-                    logger.info("Multiple results found. Selecting the first one.")
-                    self.page.click(self.selectors['search']['recommendation_item'] + " " + self.selectors['search']['recommendation_link'])
-                    self.page.wait_for_load_state("networkidle")
-                    random_delay(2, 4)
-                    break
-                elif "!1s" in self.page.url or "ChIJ" in self.page.url:
-                    break
-                random_delay(1, 2)
+            self._settle_search_results()
             
             return True
         except Exception as e:
             logger.error(f"Error during search: {e}")
             return False
 
+    def on_place_page(self):
+        """True when the page already shows a place (detail URL or name heading), e.g. a fully prefetched tab."""
+        try:
+            return is_place_url(self.page.url) or self.page.locator(self.selectors['place_details']['name']).count() > 0
+        except Exception:
+            return False
+
+    def resume_search(self, name):
+        """Finishes a search whose /maps/search/ URL was already loaded by the prefetcher."""
+        try:
+            logger.info(f"Using prefetched search for: {name}")
+            # networkidle hangs on Google Maps; _settle_search_results polls for results or the place itself
+            self.page.wait_for_load_state("domcontentloaded")
+            self._settle_search_results()
+            return True
+        except Exception as e:
+            logger.error(f"Error during prefetched search: {e}")
+            return False
+
+    def _settle_search_results(self):
+        """Waits for either a results list (opening the first hit) or a direct redirect to the place."""
+        # Use a loop to wait for either results or detail page
+        for _ in range(5):
+            if self.page.locator(self.selectors['search']['recommendation_item']).count() > 0:
+                logger.info("Multiple results found. Selecting the first one.")
+                self.page.click(self.selectors['search']['recommendation_item'] + " " + self.selectors['search']['recommendation_link'])
+                self.page.wait_for_load_state("networkidle")
+                random_delay(2, 4)
+                break
+            elif is_place_url(self.page.url):
+                break
+            random_delay(1, 2)
+
     def _extract_from_html(self, html_content, pattern, group=1, default=None):
         """Helper function to extract data from HTML using regex."""
         try:
@@ -51,7 +169,7 @@ class GoogleMapsScraper:
                 return match.group(group)
             return default
         except Exception as e:
-            logger.debug(f"Error extracting with pattern: {e}")
+            logger.debug("Error extracting with pattern: %s", e)
             return default
 
     def _get_place_id(self, html_content, metadata=None):
@@ -63,18 +181,12 @@ class GoogleMapsScraper:
         place_id = self._extract_from_html(html_content, r'(ChIJ[a-zA-Z0-9_-]{20,})', 1)
         return place_id
 
-    def get_place_details(self, name):
-        """Extracts basic info about the place."""
-        page_html = self.page.content()
-        place_id = self._get_place_id(page_html)
-        if not place_id:
-            place_id = extract_place_id_from_url(self.page.url)
-
-        lat, lng = extract_lat_long_from_url(self.page.url)
-
-        details = {
+    def _base_details(self, name, place_id, place_url):
+        """Detail row with every field present and defaulted."""
+        lat, lng = extract_lat_long_from_url(place_url or "")
+        return {
             'place_id': place_id,
-            'place_url': self.page.url,
+            'place_url': place_url,
             'nama_tempat': name,
             'latitude': lat,
             'longitude': lng,
@@ -97,32 +209,62 @@ class GoogleMapsScraper:
             'closed_on': None,
             'review_keywords': None
         }
+
+    def _apply_rating_text(self, r_text, details):
+        """Parses the F7nice summary text into rating_total / ulasan_total."""
+        # Expected format: "4.5(2,530)" or "4.5(2.530)"
+        # rating_match Example text: 4.8(2,530)
+        # Adjust regex to handle whitespace and ensure first group is rating, second group is count
+        rating_match = re.search(r"([\d\,]+[\.\,]?[\d]*)\s*\(([\d\,\.]+)\)", r_text)
+        if rating_match:
+            details['rating_total'] = rating_match.group(1).replace(',', '.') # Normalize rating to float format
+            details['ulasan_total'] = rating_match.group(2).replace('.', '').replace(',', '') # Normalize count
+        else:
+            # Fallback if regex fails but rating exists
+            details['rating_total'] = r_text
+
+    def get_place_details(self, name, metadata=None):
+        """Extracts basic info about the place."""
+        page_html = self.page.content()
+        place_id = self._get_place_id(page_html, metadata)
+        if not place_id:
+            place_id = extract_place_id_from_url(self.page.url)
+
+        details = self._base_details(name, place_id, self.page.url)
+        self.raw_detail_html = None
         
         try:
             sel = self.selectors['place_details']
+            xf = self.selectors.get('xpath_fallbacks', {})
+            
+            name_variants = [sel['name'], xf.get('name')]
             
             # Wait for any detail element to ensure page is loaded
-            try:
-                self.page.wait_for_selector(sel['name'], timeout=10000)
-            except:
+            if not self.resolver.wait_for_any(self.page, 'place_details.name', name_variants, timeout=10000):
                 logger.warning("Main name element not found within timeout.")
+            
+            if self.capture_raw:
+                panel = self.page.locator("div[role='main']")
+                if panel.count() > 0:
+                    self.raw_detail_html = panel.first.evaluate("node => node.outerHTML")
 
             # Name check (verify redirect)
-            if self.page.locator(sel['name']).count() > 0:
-                actual_name = self.page.text_content(sel['name'])
+            name_loc, _ = self.resolver.resolve(self.page, 'place_details.name', name_variants, required=True)
+            if name_loc:
+                actual_name = name_loc.first.text_content()
                 details['actual_name'] = actual_name.strip() if actual_name else name
             else:
                 details['actual_name'] = name
             
             # Rating
-            rating_loc = self.page.locator(sel['rating'])
-            if rating_loc.count() > 0:
+            rating_loc, _ = self.resolver.resolve(self.page, 'place_details.rating', [sel['rating'], xf.get('rating')])
+            if rating_loc:
                 rating_text = rating_loc.first.text_content()
                 details['rating_total'] = rating_text.strip().replace(',', '.') if rating_text else None
                 
             # Reviews count
-            reviews_count_loc = self.page.locator(sel['reviews_count'])
-            if reviews_count_loc.count() > 0:
+            reviews_count_loc, _ = self.resolver.resolve(self.page, 'place_details.reviews_count', [sel['reviews_count'], xf.get('reviews_count')])
+            if reviews_count_loc:
                 # Try getting from aria-label first as it's cleaner
                 aria_label = reviews_count_loc.first.get_attribute("aria-label")
                 if aria_label:
@@ -136,8 +278,8 @@ class GoogleMapsScraper:
                 
             # Optional info - Use both text_content and aria-label fallbacks
             for key, selector in [('alamat', 'address'), ('website', 'website'), ('telepon', 'phone')]:
-                loc = self.page.locator(sel[selector])
-                if loc.count() > 0:
+                loc, _ = self.resolver.resolve(self.page, f'place_details.{selector}', [sel[selector], xf.get(selector)])
+                if loc:
                     # Prefer text inside if available, else aria-label
                     txt = loc.first.text_content()
                     if not txt or len(txt.strip()) < 5: # Some buttons only have icons/aria-label
@@ -155,17 +297,7 @@ class GoogleMapsScraper:
             # Rating & Review Count
             rating_loc = self.page.locator("div.F7nice")
             if rating_loc.count() > 0:
-                 r_text = rating_loc.first.text_content().strip()
-                 # Expected format: "4.5(2,530)" or "4.5(2.530)"
-                 # rating_match Example text: 4.8(2,530)
-                 # Adjust regex to handle whitespace and ensure first group is rating, second group is count
-                 rating_match = re.search(r"([\d\,]+[\.\,]?[\d]*)\s*\(([\d\,\.]+)\)", r_text)
-                 if rating_match:
-                     details['rating_total'] = rating_match.group(1).replace(',', '.') # Normalize rating to float format
-                     details['ulasan_total'] = rating_match.group(2).replace('.', '').replace(',', '') # Normalize count
-                 else:
-                     # Fallback if regex fails but rating exists
-                     details['rating_total'] = r_text
+                self._apply_rating_text(rating_loc.first.text_content().strip(), details)
             
             # Description
             desc_loc = self.page.locator("div.PYvSYb")
@@ -200,22 +332,6 @@ class GoogleMapsScraper:
             if timing_loc.count() > 0:
                  details['workday_timing'] = timing_loc.first.get_attribute("aria-label")
             
-            # --- XPath Fallbacks for Details ---
-            xf = self.selectors.get('xpath_fallbacks', {})
-            if not details.get('alamat') and xf.get('address'):
-                details['alamat'] = self.page.text_content(xf['address']).strip() if self.page.locator(xf['address']).count() > 0 else details['alamat']
-            if not details.get('website') and xf.get('website'):
-                details['website'] = self.page.text_content(xf['website']).strip() if self.page.locator(xf['website']).count() > 0 else details['website']
-            if not details.get('telepon') and xf.get('phone'):
-                details['telepon'] = self.page.text_content(xf['phone']).strip() if self.page.locator(xf['phone']).count() > 0 else details['telepon']
-            if not details.get('rating_total') and xf.get('rating'):
-                details['rating_total'] = self.page.text_content(xf['rating']).strip() if self.page.locator(xf['rating']).count() > 0 else details['rating_total']
-            if not details.get('ulasan_total') and xf.get('reviews_count'):
-                count_txt = self.page.text_content(xf['reviews_count'])
-                if count_txt:
-                    count = "".join(filter(str.isdigit, count_txt))
-                    details['ulasan_total'] = int(count) if count else details['ulasan_total']
-            
             logger.info(f"Extracted details for: {details['actual_name']}")
             return details
         except Exception as e:
@@ -225,39 +341,33 @@ class GoogleMapsScraper:
     def scrape_reviews(self, place_id, name, place_url=""):
         """Navigates to reviews tab and scrapes them with infinite scroll."""
         reviews = []
+        self.last_error = None
+        self.raw_review_html = []
         try:
             sel = self.selectors['reviews']
+            xf = self.selectors.get('xpath_fallbacks', {})
             
-            # Click reviews tab - Try both aria-label and text
-            tab_locators = [
-                self.page.locator(sel['tab_button']),
-                self.page.locator("button:has-text('Ulasan')"),
-                self.page.locator("div[role='tab']:has-text('Ulasan')")
-            ]
-            
-            tab_clicked = False
-            for loc in tab_locators:
-                if loc.count() > 0 and loc.first.is_visible():
-                    logger.info(f"Clicking reviews tab using locator: {loc}")
-                    loc.first.click()
-                    tab_clicked = True
-                    break
+            # Click reviews tab - Try both aria-label and text, best-performing variant first
+            tab_loc, tab_variant = self.resolver.resolve(self.page, 'reviews.tab_button', [
+                sel['tab_button'],
+                "button:has-text('Ulasan')",
+                "div[role='tab']:has-text('Ulasan')"
+            ], visible=True, required=True)
             
-            if not tab_clicked:
+            if not tab_loc:
                 logger.error("Reviews tab not found or not clickable.")
                 return []
             
+            logger.info(f"Clicking reviews tab using selector: {tab_variant}")
+            tab_loc.first.click()
+            
             # Use explicit delay instead of networkidle which hangs on Google Maps
             random_delay(3, 5)
                 
             # Sort by newest
-            sort_btn = self.page.locator(sel['sort_button'])
-            xf = self.selectors.get('xpath_fallbacks', {})
-            
-            if sort_btn.count() == 0 and xf.get('sort_button'):
-                sort_btn = self.page.locator(xf['sort_button'])
+            sort_btn, _ = self.resolver.resolve(self.page, 'reviews.sort_button', [sel['sort_button'], xf.get('sort_button')], visible=True, required=True)
                 
-            if sort_btn.count() > 0 and sort_btn.first.is_visible():
+            if sort_btn:
                 logger.info("Opening sort menu.")
                 sort_btn.first.click()
                 random_delay(2, 3)
@@ -268,15 +378,12 @@ class GoogleMapsScraper:
                 except:
                     pass
                     
-                newest_opt = self.page.locator(sel['sort_newest'])
-                if newest_opt.count() == 0:
-                    newest_opt = self.page.locator("div[role='menuitemradio']:has-text('Terbaru'), div[role='menuitem']:has-text('Terbaru')")
-                if newest_opt.count() == 0:
-                    newest_opt = self.page.locator("text=Terbaru")
-                if newest_opt.count() == 0 and xf.get('sort_newest'):
-                    newest_opt = self.page.locator(xf['sort_newest'])
+                newest_opt, _ = self.resolver.resolve(self.page, 'reviews.sort_newest', [
+                    sel['sort_newest'],
+                    "div[role='menuitemradio']:has-text('Terbaru'), div[role='menuitem']:has-text('Terbaru')"
+                ], required=True, fallbacks=["text=Terbaru", xf.get('sort_newest')])
                     
-                if newest_opt.count() > 0:
+                if newest_opt:
                     logger.info(f"Selecting 'Terbaru' sort option.")
                     newest_opt.first.click()
                     # Wait for reviews to refresh using manual delay rather than networkidle
@@ -288,62 +395,27 @@ class GoogleMapsScraper:
                 
             # Infinite scroll logic - Use a more robust way to find the scrollable container
             # In GMap, the scrollable list is typically the div with tabindex="-1" inside the main role.
-            container_locator = self.page.locator("div.m6QErb.DxyBCb.kA9KIf.dS8AEf[tabindex='-1']").first
-            
-            if container_locator.count() == 0:
-                container_locator = self.page.locator("div[role='main']").locator("..").locator("div.m6QErb[tabindex='-1']").first
-            if container_locator.count() == 0:
-                container_locator = self.page.locator("div[role='main']").first
+            container_loc, _ = self.resolver.resolve(self.page, 'reviews.container', [
+                "div.m6QErb.DxyBCb.kA9KIf.dS8AEf[tabindex='-1']",
+                "div[role='main'] >> xpath=.. >> div.m6QErb[tabindex='-1']"
+            ], required=True, fallbacks=["div[role='main']"])
                 
-            if container_locator.count() == 0:
+            if not container_loc:
                 logger.error(f"Review container not found.")
                 return []
+            container_locator = container_loc.first
 
-            last_height = container_locator.evaluate("node => node.scrollHeight")
-
-            max_scrolls = int(os.getenv("SCROLL_RETRY", "5")) * 10
-            scroll_count = 0
-            
-            while scroll_count < max_scrolls:
-                # Scroll down using the correct element
-                container_locator.evaluate("node => node.scrollBy(0, 5000)")
-                # Also try to scroll the last review item into view if possible
-                try:
-                    last_item = self.page.locator(sel['item']).last
-                    if last_item.count() > 0:
-                        last_item.scroll_into_view_if_needed(timeout=1000)
-                except Exception:
-                    pass
-                
-                random_delay(1.5, 3)
-                
-                # Check for 'Ulasan lainnya' button (Pagination)
-                more_reviews_btn = self.page.locator(sel['more_reviews_button'])
-                if more_reviews_btn.count() > 0 and more_reviews_btn.first.is_visible():
-                    logger.info("Clicking 'Ulasan lainnya' button.")
-                    more_reviews_btn.first.click()
-                    random_delay(2, 4)
-                
-                new_height = container_locator.evaluate("node => node.scrollHeight")
-                if new_height == last_height:
-                    # Give it one more chance with a slightly bigger scroll
-                    container_locator.evaluate("node => node.scrollBy(0, 5000)")
-                    random_delay(1, 2)
-                    new_height = container_locator.evaluate("node => node.scrollHeight")
-                    if new_height == last_height:
-                        logger.info("Reached the end of the list or stuck.")
-                        break
-                    
-                last_height = new_height
-                scroll_count += 1
-                
-                # Check if we have enough reviews based on date or count threshold
-                current_count = self.page.locator(sel['item']).count()
-                max_reviews = int(os.getenv("MAX_REVIEWS", "100"))
-                if max_reviews > 0 and current_count >= max_reviews: 
-                    break
-                
-            logger.info(f"Finished scrolling/clicking. Found {self.page.locator(sel['item']).count()} potential reviews.")
+            result = container_locator.evaluate(SCROLL_DRIVER_JS, {
+                'itemSelector': sel['item'],
+                'moreSelector': sel['more_reviews_button'],
+                'target': self.max_reviews,
+                'maxScrolls': self.max_scrolls,
+                'stallMs': self.scroll_stall_ms,
+                'timeoutMs': self.scroll_timeout_ms,
+                'minPauseMs': 1500,
+                'maxPauseMs': 3000
+            })
+            logger.info(f"Finished scrolling/clicking ({result['reason']}, {result['scrolls']} scrolls, {result['clicks']} 'Ulasan lainnya' clicks, {result['elapsedMs'] / 1000:.1f}s). Found {result['count']} potential reviews.")
             
             # Extract data from review items
             review_items = self.page.locator(sel['item']).all()
@@ -355,29 +427,40 @@ class GoogleMapsScraper:
                         more_btn.first.click()
                         random_delay(0.5, 1)
                         
-                    review_data = {
-                        'place_id': place_id,
-                        'place_url': place_url,
-                        'nama_tempat': name,
-                        'review_id': item.get_attribute("data-review-id"),
-                        'author_name': item.locator(sel['author']).text_content(),
-                        'rating_ulasan': item.locator(sel['rating']).get_attribute("aria-label"),
-                        'tanggal_raw': item.locator(sel['date']).text_content(),
-                        'isi_review': item.locator(sel['text']).text_content() if item.locator(sel['text']).count() > 0 else "",
-                        # Owner reply detection
-                        'balasan_pemilik': "",
-                        'tanggal_balasan_raw': ""
-                    }
-                    
-                    # Small logic for owner reply (usually nested or separate div with same text style but different container)
-                    # This depends on local language. In REVIEWS_PAGE_HTML we saw 'Balasan dari pemilik' pattern.
-                    # For now, we use a simple approach or fallback.
-                    
+                    review_data = self.extract_review_item(item, place_id, name, place_url)
                     reviews.append(review_data)
                 except Exception as ex:
                     logger.warning(f"Error extracting single review: {ex}")
+            
+            if self.capture_raw:
+                # One round trip for all fragments, taken after 'More' expanded the long texts
+                self.raw_review_html = self.page.locator(sel['item']).evaluate_all("els => els.map(e => e.outerHTML)")
                     
             return reviews
         except Exception as e:
             logger.error(f"Error during review scraping: {e}")
+            self.last_error = str(e)
             return reviews
+
+    def extract_review_item(self, item, place_id, name, place_url=""):
+        """Builds one review row from a review item locator. Shared by live scraping and archive re-extraction."""
+        sel = self.selectors['reviews']
+        review_data = {
+            'place_id': place_id,
+            'place_url': place_url,
+            'nama_tempat': name,
+            'review_id': item.get_attribute("data-review-id"),
+            'author_name': item.locator(sel['author']).text_content(),
+            'rating_ulasan': item.locator(sel['rating']).get_attribute("aria-label"),
+            'tanggal_raw': item.locator(sel['date']).text_content(),
+            'isi_review': item.locator(sel['text']).text_content() if item.locator(sel['text']).count() > 0 else "",
+            # Owner reply detection
+            'balasan_pemilik': "",
+            'tanggal_balasan_raw': ""
+        }
+        
+        # Small logic for owner reply (usually nested or separate div with same text style but different container)
+        # This depends on local language. In REVIEWS_PAGE_HTML we saw 'Balasan dari pemilik' pattern.
+        # For now, we use a simple approach or fallback.
+        
+        return review_data
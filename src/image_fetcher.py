@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import os
+import struct
+import threading
+from src.logger_handler import setup_logger
+
+logger = setup_logger()
+
+_EXTENSIONS = {'png': '.png', 'gif': '.gif', 'jpeg': '.jpg', 'webp': '.webp'}
+
+def image_info(data):
+    """Returns (format, width, height) from the image header, or (None, None, None) if unrecognised."""
+    try:
+        if data[:8] == b'\x89PNG\r\n\x1a\n':
+            width, height = struct.unpack('>II', data[16:24])
+            return 'png', width, height
+        if data[:6] in (b'GIF87a', b'GIF89a'):
+            width, height = struct.unpack('<HH', data[6:10])
+            return 'gif', width, height
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            chunk = data[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', data[26:30])
+                return 'webp', width & 0x3fff, height & 0x3fff
+            if chunk == b'VP8L':
+                bits = int.from_bytes(data[21:25], 'little')
+                return 'webp', (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X':
+                return 'webp', int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        if data[:2] == b'\xff\xd8':
+            # Walk the JPEG segments up to the first start-of-frame marker
+            i = 2
+            while i + 9 < len(data):
+                if data[i] != 0xFF:
+                    i += 1
+                    continue
+                marker = data[i + 1]
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack('>HH', data[i + 5:i + 9])
+                    return 'jpeg', width, height
+                i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    except struct.error:
+        pass
+    return None, None, None
+
+class ImageFetcher:
+    """Downloads featured images on a background asyncio loop into a content-addressed store."""
+    def __init__(self, store_dir=None, concurrency=None, enabled=None):
+        self.enabled = enabled if enabled is not None else os.getenv("FETCH_IMAGES", "false").lower() == "true"
+        self.store_dir = store_dir or os.getenv("IMAGE_STORE_DIR", "images")
+        self.concurrency = concurrency or int(os.getenv("IMAGE_CONCURRENCY", "8"))
+        self.timeout = float(os.getenv("IMAGE_TIMEOUT", "20"))
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._semaphore = None
+        self._inflight = {}
+
+    def start(self):
+        if not self.enabled:
+            return self
+        import httpx
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="images", daemon=True)
+        self._thread.start()
+
+        async def _setup():
+            # One pooled client for the whole run; connections are reused across images
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        asyncio.run_coroutine_threadsafe(_setup(), self._loop).result()
+        return self
+
+    def submit(self, url):
+        """Schedules a download; returns a concurrent Future of the image fields, or None if disabled/no URL."""
+        if not self._loop or not url:
+            return None
+        # Same URL within a run is fetched once
+        if url not in self._inflight:
+            self._inflight[url] = asyncio.run_coroutine_threadsafe(self._fetch(url), self._loop)
+        return self._inflight[url]
+
+    def fetch_many(self, urls):
+        """Blocking helper: fetches all URLs concurrently and returns their results in order."""
+        futures = [self.submit(url) for url in urls]
+        return [f.result() if f else None for f in futures]
+
+    async def _fetch(self, url):
+        async with self._semaphore:
+            response = await self._client.get(url)
+            response.raise_for_status()
+            data = response.content
+        
+        fmt, width, height = image_info(data)
+        digest = hashlib.sha256(data).hexdigest()
+        folder = os.path.join(self.store_dir, digest[:2])
+        path = os.path.join(folder, digest + _EXTENSIONS.get(fmt, '.bin'))
+        # Content-addressed: identical bytes from different URLs share one file
+        if not os.path.exists(path):
+            os.makedirs(folder, exist_ok=True)
+            tmp_path = path + ".part"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return {
+            'featured_image_path': path,
+            'featured_image_width': width,
+            'featured_image_height': height
+        }
+
+    def close(self):
+        """Closes the HTTP client and stops the loop thread."""
+        if not self._loop:
+            return
+        if self._client:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,96 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from src.logger_handler import setup_logger
+
+logger = setup_logger()
+
+# Indonesian function words plus the chat abbreviations common in Maps reviews
+INDONESIAN_STOPWORDS = {
+    'ada', 'adalah', 'agak', 'agar', 'akan', 'aku', 'all', 'amat', 'anda', 'apa', 'apakah', 'atau', 'bagi',
+    'bahkan', 'bahwa', 'banget', 'bgt', 'baru', 'begitu', 'belum', 'benar', 'berapa', 'bisa', 'boleh',
+    'bukan', 'cukup', 'dalam', 'dan', 'dapat', 'dari', 'daripada', 'deh', 'dengan', 'dgn', 'di', 'dia',
+    'dll', 'dong', 'dulu', 'engga', 'enggak', 'for', 'gak', 'ga', 'gk', 'gitu', 'hal', 'hanya', 'harus',
+    'hari', 'ini', 'itu', 'jadi', 'jd', 'jika', 'juga', 'jg', 'kalau', 'kalo', 'kami', 'kamu', 'kan',
+    'karena', 'krn', 'kata', 'ke', 'kebanyakan', 'kembali', 'kita', 'kok', 'kurang', 'lagi', 'lah', 'lain',
+    'lalu', 'lebih', 'lg', 'mah', 'maka', 'mana', 'masih', 'mau', 'memang', 'mereka', 'mungkin', 'nah',
+    'namun', 'nggak', 'ngga', 'nya', 'oleh', 'pada', 'para', 'pernah', 'pun', 'punya', 'saat', 'saja', 'aja',
+    'saya', 'sangat', 'sdh', 'sebagai', 'sebelum', 'sedang', 'sekali', 'sekarang', 'selalu', 'semua',
+    'seperti', 'sih', 'sini', 'situ', 'so', 'sudah', 'udah', 'udh', 'supaya', 'tak', 'tapi', 'tp',
+    'telah', 'tentang', 'terlalu', 'tersebut', 'tetapi', 'tidak', 'tdk', 'utk', 'untuk', 'waktu', 'ya',
+    'yang', 'yg', 'the', 'and', 'is', 'it', 'to', 'of', 'was', 'very', 'this', 'with', 'but', 'not',
+    'google', 'diterjemahkan', 'asli', 'ulasan'
+}
+
+def compute_place_keywords(reviews, text_col='isi_review', group_col='place_id', top_k=None):
+    """Top distinctive terms per place as {place_id: 'kw1, kw2, ...'}.
+
+    Review term counts are summed per place with one sparse indicator-matrix product, then TF-IDF is
+    computed across places so each place's keywords are what sets it apart from the rest of the shard.
+    """
+    top_k = top_k or int(os.getenv("REVIEW_KEYWORDS_TOP_K", "10"))
+    reviews = reviews[reviews[group_col].fillna('') != '']
+    texts = reviews[text_col].fillna('').astype(str)
+    if texts.empty:
+        return {}
+    
+    vectorizer = CountVectorizer(
+        lowercase=True,
+        stop_words=sorted(INDONESIAN_STOPWORDS),
+        token_pattern=r'(?u)\b[^\W\d_]{3,}\b',
+        ngram_range=(1, 2),
+        min_df=int(os.getenv("REVIEW_KEYWORDS_MIN_DF", "2")),
+        max_features=int(os.getenv("REVIEW_KEYWORDS_MAX_FEATURES", "200000")),
+        dtype=np.float32
+    )
+    try:
+        counts = vectorizer.fit_transform(texts)
+    except ValueError:
+        # Every review empty or stopwords only
+        return {}
+    
+    codes, places = pd.factorize(reviews[group_col])
+    indicator = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.float32), (codes, np.arange(len(codes)))),
+        shape=(len(places), len(codes))
+    )
+    place_terms = TfidfTransformer(sublinear_tf=True).fit_transform(indicator @ counts).tocsr()
+    
+    vocab = vectorizer.get_feature_names_out()
+    keywords = {}
+    for row in range(place_terms.shape[0]):
+        start, end = place_terms.indptr[row], place_terms.indptr[row + 1]
+        if start == end:
+            continue
+        scores = place_terms.data[start:end]
+        top = np.argsort(-scores, kind='stable')[:top_k]
+        keywords[places[row]] = ", ".join(vocab[place_terms.indices[start:end][top]])
+    return keywords
+
+def fill_review_keywords(reviews_path, places_path=None):
+    """Computes keywords from a shard's reviews CSV and writes them into review_keywords.
+
+    Denormalized output: pass the single CSV; every row gets its place's keywords.
+    Normalized output: pass the reviews CSV and the places CSV; only the places table is updated.
+    """
+    # Everything as text: type guessing would rewrite values such as phone 0812345 as 812345.0
+    read_opts = dict(encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    reviews = pd.read_csv(reviews_path, usecols=lambda c: c in ('place_id', 'place_url', 'isi_review'), **read_opts)
+    reviews['place_key'] = _place_key(reviews)
+    keywords = compute_place_keywords(reviews, group_col='place_key')
+    
+    target_path = places_path or reviews_path
+    df = pd.read_csv(target_path, **read_opts)
+    df['review_keywords'] = _place_key(df).map(keywords).fillna('')
+    df.to_csv(target_path, index=False, encoding='utf-8-sig')
+    logger.info(f"Review keywords for {len(keywords)} places written to {target_path}")
+    return keywords
+
+def _place_key(df):
+    """place_id, falling back to place_url for rows scraped without one (same rule as build_place_row)."""
+    key = df['place_id'] if 'place_id' in df else pd.Series('', index=df.index)
+    if 'place_url' in df:
+        key = key.where(key != '', df['place_url'])
+    return key
@@ -1,32 +1,180 @@
 import logging
+import logging.handlers
 import os
+import json
+import queue
+import random
+import atexit
+import contextvars
+import copy
 from datetime import datetime
 
-def setup_logger(log_folder="logs"):
-    """Sets up logging to console and file."""
+# Per-thread/task context stamped onto every record (see log_context)
+_worker_var = contextvars.ContextVar("log_worker", default=os.getenv("WORKER_ID"))
+_place_var = contextvars.ContextVar("log_place", default=None)
+_stage_var = contextvars.ContextVar("log_stage", default=None)
+
+_listener = None
+
+def log_context(worker=None, place=None, stage=None):
+    """Sets the worker/place/stage fields attached to subsequent log records of the current thread."""
+    if worker is not None:
+        _worker_var.set(worker)
+    if place is not None:
+        _place_var.set(place)
+    if stage is not None:
+        _stage_var.set(stage)
+
+class ContextFilter(logging.Filter):
+    """Stamps context fields in the producing thread, before the record crosses the queue."""
+    def filter(self, record):
+        record.worker = getattr(record, 'worker', None) or _worker_var.get() or record.threadName
+        record.place = getattr(record, 'place', None) or _place_var.get()
+        record.stage = getattr(record, 'stage', None) or _stage_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG records; higher levels always pass."""
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records with the message merged but exc_info kept, so tracebacks are formatted on the listener side.
+
+    With cross_process=True the traceback is rendered into exc_text instead, since traceback objects do not pickle.
+    """
+    def __init__(self, queue, cross_process=False):
+        super().__init__(queue)
+        self.cross_process = cross_process
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        # Freeze the message now; args may be mutated by the caller after logging returns
+        record.msg = record.getMessage()
+        record.args = None
+        if self.cross_process and record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the structured context fields."""
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'msg': record.getMessage(),
+            'worker': getattr(record, 'worker', None),
+            'place': getattr(record, 'place', None),
+            'stage': getattr(record, 'stage', None)
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def _build_file_handler(log_file):
+    """Size-based rotation by default, time-based when LOG_ROTATE_WHEN is set (e.g. 'midnight', 'H')."""
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    rotate_when = os.getenv("LOG_ROTATE_WHEN", "")
+    if rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=rotate_when, backupCount=backup_count, encoding='utf-8')
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+    return logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+
+def setup_logger(log_folder=None):
+    """Sets up logging to console and file through a background queue listener."""
+    global _listener
+    logger = logging.getLogger("gmaps_scraper")
+    # Already configured by an earlier import; skip the folder/file setup
+    if logger.handlers:
+        return logger
+
+    log_folder = log_folder or os.getenv("LOG_FOLDER", "logs")
     if not os.path.exists(log_folder):
         os.makedirs(log_folder)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_folder, f"scrape_log_{timestamp}.txt")
+    log_format = os.getenv("LOG_FORMAT", "json").lower()
+    extension = "jsonl" if log_format == "json" else "txt"
+    log_file = os.path.join(log_folder, f"scrape_log_{timestamp}.{extension}")
     
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    
+    # Formatter
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(worker)s|%(place)s|%(stage)s] %(message)s')
+    
+    # File handler
+    file_handler = _build_file_handler(log_file)
+    file_handler.setFormatter(formatter)
+    
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    
+    # The scrape loop only pays for an enqueue; formatting and disk I/O happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))))
+    logger.addHandler(queue_handler)
+    
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logger)
+    
+    return logger
+
+def forward_worker_logs():
+    """Parent side of process-pool logging: returns (queue, listener) feeding worker records into this process's log.
+
+    Pass the queue to init_worker_logging in each worker and stop the listener once the pool is done.
+    """
+    import multiprocessing
+    setup_logger()
+    worker_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(worker_queue, *_listener.handlers, respect_handler_level=True)
+    listener.start()
+    return worker_queue, listener
+
+def init_worker_logging(worker_queue, worker=None):
+    """Worker side: routes this process's records to the parent's queue.
+
+    A forked worker inherits the parent's queue handler, but not the listener thread behind it, so its records
+    would be lost without this.
+    """
+    global _listener
     logger = logging.getLogger("gmaps_scraper")
-    logger.setLevel(logging.INFO)
-    
-    # Avoid duplicate handlers
-    if not logger.handlers:
-        # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # File handler
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(formatter)
-        
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+    if _listener:
+        # Forked copy of the parent's listener (thread already gone) or, when spawned, this process's own one
+        _listener.stop()
+        _listener = None
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
     
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    queue_handler = StructuredQueueHandler(worker_queue, cross_process=True)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))))
+    logger.addHandler(queue_handler)
+    log_context(worker=worker or f"pid-{os.getpid()}")
     return logger
+
+def shutdown_logger():
+    """Drains the queue and stops the listener thread."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
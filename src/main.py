@@ -1,9 +1,17 @@
 import pandas as pd
 import os
+from datetime import datetime
 from src.browser_manager import BrowserManager
 from src.google_maps_scraper import GoogleMapsScraper
+from src.selector_resolver import SelectorResolver
+from src.snapshot_store import SnapshotStore
+from src.tail_tracer import TailTracer
 from src.data_processor import DataProcessor
-from src.logger_handler import setup_logger
+from src.export_pipeline import ExportPipeline
+from src.raw_archive import RawArchive
+from src.image_fetcher import ImageFetcher
+from src.prefetcher import PlacePrefetcher
+from src.logger_handler import setup_logger, log_context
 from src.utils import random_delay
 
 logger = setup_logger()
@@ -12,6 +20,10 @@ def main():
     # Load configuration
     input_file = os.getenv("INPUT_FILE", "input_data/nama_tempat.csv")
     gmaps_url = os.getenv("G_MAPS_URL", "https://www.google.com/maps")
+    # denormalized: one CSV row per review with place fields repeated; normalized: places + reviews tables
+    output_mode = os.getenv("OUTPUT_MODE", "denormalized").lower()
+    # Refresh runs: skip review scraping for places whose detail snapshot has not changed
+    skip_unchanged = os.getenv("SKIP_UNCHANGED", "false").lower() == "true"
     
     if not os.path.exists(input_file):
         logger.error(f"Input file not found: {input_file}")
@@ -33,57 +45,138 @@ def main():
 
     browser_mgr = BrowserManager(headless=(os.getenv("HEADLESS", "true").lower() == "true"))
     processor = DataProcessor()
+    resolver = SelectorResolver()
+    snapshots = SnapshotStore()
+    tracer = TailTracer()
+    archive = RawArchive()
+    pipeline = ExportPipeline(processor, output_mode, archive=archive).start()
+    images = ImageFetcher().start()
     
     errors = []
+    statuses = []
 
     try:
         page = browser_mgr.start_browser()
-        scraper = GoogleMapsScraper(page)
+        scraper = GoogleMapsScraper(page, resolver, capture_raw=archive.enabled)
+        prefetcher = PlacePrefetcher(browser_mgr, gmaps_url)
 
-        for place_name in to_process:
+        for idx, place_name in enumerate(to_process):
             try:
+                log_context(place=place_name, stage="search")
                 logger.info(f"--- Processing: {place_name} ---")
-                page.goto(gmaps_url)
-                page.wait_for_load_state("domcontentloaded")
+                tracer.start(browser_mgr.context, place_name)
+                scraper.last_error = None
                 
-                if scraper.search_place(place_name):
-                    # Give it a bit more time to settle the URL
-                    random_delay(2, 4)
+                prefetched_page = prefetcher.take(place_name)
+                ready = False
+                if prefetched_page:
+                    page = prefetched_page
+                    scraper.page = page
+                    scraper.handle_consent()
+                    # The prefetched tab may already show the place if advance() opened it during the previous place
+                    ready = scraper.on_place_page()
+                    if ready:
+                        logger.info(f"Prefetched tab already shows {place_name}.")
+                    found = ready or scraper.resume_search(place_name)
+                else:
+                    page.goto(gmaps_url)
+                    page.wait_for_load_state("domcontentloaded")
+                    scraper.handle_consent()
+                    found = scraper.search_place(place_name)
+                if found:
+                    if not ready:
+                        # Give it a bit more time to settle the URL
+                        random_delay(2, 4)
+                    log_context(stage="details")
                     details = scraper.get_place_details(place_name)
                     place_id = details.get('place_id')
                     place_url = details.get('place_url', page.url)
                     
-                    # Proceed even if place_id is missing
-                    raw_reviews = scraper.scrape_reviews(place_id, place_name, place_url)
-                    processed_reviews = processor.process_reviews(raw_reviews, details)
+                    # Next place loads in a second tab while this one scrolls; before a context switch the tab
+                    # is opened in the context the loop switches to
+                    if idx + 1 < len(to_process):
+                        prefetcher.prefetch(to_process[idx + 1], next_context=(idx % 2 == 1))
                     
-                    # Write progressively to clear memory and secure data
-                    processor.export_to_csv(processed_reviews)
-                    logger.info(f"Successfully scraped and exported {len(processed_reviews)} reviews for {place_name}.")
+                    if skip_unchanged and snapshots.is_unchanged(details):
+                        logger.info(f"No change since last snapshot for {place_name}; skipping reviews.")
+                        statuses.append({"place_name": place_name, "place_id": place_id, "status": "unchanged"})
+                    else:
+                        # Download starts now and overlaps with review scrolling
+                        image_future = images.submit(details.get('featured_image'))
+                        
+                        # Proceed even if place_id is missing
+                        log_context(stage="reviews")
+                        raw_reviews = scraper.scrape_reviews(place_id, place_name, place_url)
+                        # Written on the export thread; the capture time is kept for relative review dates
+                        raw_html = (scraper.raw_detail_html, scraper.raw_review_html, datetime.now()) if archive.enabled else None
+                        def on_exported(ok, place_name=place_name, place_id=place_id, details=details, raw_reviews=raw_reviews, last_error=scraper.last_error):
+                            """Runs on the export thread once the batch is written (or has failed)."""
+                            statuses.append({"place_name": place_name, "place_id": place_id, "status": "scraped" if ok else "export_failed"})
+                            # Only snapshot complete review scrapes that reached disk, and only when some were
+                            # collected, so a failed or partial scrape or export is retried next run
+                            if ok and last_error is None and (raw_reviews or details.get('ulasan_total') in (0, '0')):
+                                snapshots.update(details, raw_reviews[0].get('review_id') if raw_reviews else None)
+                        
+                        # Processing and CSV export run on the pipeline thread
+                        pipeline.submit(place_name, raw_reviews, details, image_future, on_done=on_exported, raw_html=raw_html)
+                        logger.info(f"Successfully scraped {len(raw_reviews)} reviews for {place_name}; queued for export.")
+                        
+                        if not place_id:
+                            logger.warning(f"Note: Place ID was not found for {place_name}, but continuing with name/link.")
                     
-                    if not place_id:
-                        logger.warning(f"Note: Place ID was not found for {place_name}, but continuing with name/link.")
+                    # The search page has loaded during the scroll; open its result so the panel loads during the pause below
+                    prefetcher.advance()
                 else:
                     logger.warning(f"Place not found: {place_name}")
                     errors.append({"place_name": place_name, "error": "Search failed"})
+                    statuses.append({"place_name": place_name, "place_id": None, "status": "not_found"})
+                
+                # Must run before the context is switched or recycled below
+                tracer.stop(error=scraper.last_error if found else "Search failed")
                 
                 # Random delay between places
                 random_delay(5, 10)
                 
                 # Fresh context every 2 places to avoid detection
-                if to_process.index(place_name) % 2 == 1:
+                if idx % 2 == 1:
                     logger.info("Switching to a fresh browser context.")
                     page = browser_mgr.get_new_context()
                     scraper.page = page
+                
+                # Keep the worker within its memory budget
+                recycled_page = browser_mgr.recycle_if_needed()
+                if recycled_page:
+                    page = recycled_page
+                    scraper.page = page
 
             except Exception as e:
                 logger.error(f"Unexpected error processing {place_name}: {e}")
+                tracer.stop(error=str(e))
                 errors.append({"place_name": place_name, "error": str(e)})
+                statuses.append({"place_name": place_name, "place_id": None, "status": "error"})
 
+        # Wait for queued batches before reporting
+        pipeline.close()
+        errors.extend(pipeline.failures)
+        
+        if os.getenv("REVIEW_KEYWORDS", "false").lower() == "true":
+            from src.keyword_extractor import fill_review_keywords
+            if output_mode == "normalized":
+                reviews_path, places_path = processor.session_path("gmaps_scrape_reviews"), processor.session_path("gmaps_scrape_places")
+            else:
+                reviews_path, places_path = processor.session_path("gmaps_scrape"), None
+            if os.path.exists(reviews_path):
+                fill_review_keywords(reviews_path, places_path)
+        
         # Export errors
         processor.export_errors(errors)
+        processor.export_run_status(statuses)
 
     finally:
+        pipeline.close()
+        images.close()
+        resolver.save()
+        snapshots.save()
         browser_mgr.close_browser()
         logger.info("Scraping process completed.")
 
@@ -0,0 +1,276 @@
+import re
+from html.parser import HTMLParser
+
+# Elements that never have children, so the parser must not wait for their end tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+}
+
+class _Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent', 'order')
+
+    def __init__(self, tag, attrs, parent, order):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+        self.order = order
+
+    def text(self):
+        """textContent: all descendant text, in document order."""
+        return "".join(c if isinstance(c, str) else c.text() for c in self.children)
+
+    def descendants(self):
+        for child in self.children:
+            if not isinstance(child, str):
+                yield child
+                yield from child.descendants()
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node(None, {}, None, 0)
+        self.stack = [self.root]
+        self.count = 0
+
+    def _add(self, tag, attrs):
+        self.count += 1
+        node = _Node(tag, {k: (v if v is not None else "") for k, v in attrs}, self.stack[-1], self.count)
+        self.stack[-1].children.append(node)
+        return node
+
+    def handle_starttag(self, tag, attrs):
+        node = self._add(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._add(tag, attrs)
+
+    def handle_endtag(self, tag):
+        # Unbalanced end tags close up to the matching open element, or are ignored
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+# --- CSS subset: tag, .class, #id, [attr op value], :has-text(), descendant/child combinators, selector lists ---
+
+_TAG_RE = re.compile(r'\*|[a-zA-Z][\w-]*')
+_PART_RE = re.compile(
+    r"\.(?P<cls>[\w-]+)"
+    r"|#(?P<id>[\w-]+)"
+    r"|\[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[\^$*~|]?=)\s*(?:'(?P<sq>[^']*)'|\"(?P<dq>[^\"]*)\"|(?P<bare>[^\]\s]+)))?\s*\]"
+    r"|:has-text\(\s*(?:'(?P<hsq>[^']*)'|\"(?P<hdq>[^\"]*)\")\s*\)"
+)
+
+class UnsupportedSelector(ValueError):
+    pass
+
+def _split_top(selector, seps):
+    """Splits on seps outside quotes, brackets and parentheses. Separators are kept as their own items."""
+    parts, buf, depth, quote = [], "", 0, None
+    for ch in selector:
+        if quote:
+            buf += ch
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+            buf += ch
+        elif ch in "[(":
+            depth += 1
+            buf += ch
+        elif ch in "])":
+            depth -= 1
+            buf += ch
+        elif depth == 0 and ch in seps:
+            parts.extend([buf, ch])
+            buf = ""
+        else:
+            buf += ch
+    parts.append(buf)
+    return parts
+
+def _parse_compound(text):
+    m = _TAG_RE.match(text)
+    tag = m.group(0).lower() if m else None
+    pos = m.end() if m else 0
+    tests = []
+    while pos < len(text):
+        m = _PART_RE.match(text, pos)
+        if not m:
+            raise UnsupportedSelector(text)
+        if m.group('cls') is not None:
+            tests.append(('class', m.group('cls')))
+        elif m.group('id') is not None:
+            tests.append(('attr', 'id', '=', m.group('id')))
+        elif m.group('attr') is not None:
+            value = next((v for v in (m.group('sq'), m.group('dq'), m.group('bare')) if v is not None), None)
+            tests.append(('attr', m.group('attr').lower(), m.group('op'), value))
+        else:
+            needle = m.group('hsq') if m.group('hsq') is not None else m.group('hdq')
+            tests.append(('has-text', " ".join(needle.split()).lower()))
+        pos = m.end()
+    return tag if tag != '*' else None, tests
+
+def _parse_complex(text):
+    """Returns [(combinator, compound), ...]; the first combinator is None."""
+    steps, combinator = [], None
+    for token in _split_top(text.strip(), " >"):
+        token = token.strip()
+        if not token:
+            if combinator is None and steps:
+                combinator = ' '
+            continue
+        if token == '>':
+            combinator = '>'
+            continue
+        steps.append((combinator if steps else None, _parse_compound(token)))
+        combinator = None
+    if not steps:
+        raise UnsupportedSelector(text)
+    return steps
+
+def parse_selector(selector):
+    """Parses a CSS selector list. Playwright-only engines (xpath=, text=, >>) raise UnsupportedSelector."""
+    if re.match(r'^\s*\w+=', selector) or '>>' in selector:
+        raise UnsupportedSelector(selector)
+    return [_parse_complex(part) for part in _split_top(selector, ",")[::2]]
+
+def _attr_matches(actual, op, value):
+    if op is None:
+        return actual is not None
+    if actual is None:
+        return False
+    if op == '=':
+        return actual == value
+    if op == '^=':
+        return bool(value) and actual.startswith(value)
+    if op == '$=':
+        return bool(value) and actual.endswith(value)
+    if op == '*=':
+        return bool(value) and value in actual
+    if op == '~=':
+        return value in actual.split()
+    return actual == value or actual.startswith(value + '-')
+
+def _compound_matches(node, compound):
+    tag, tests = compound
+    if tag and node.tag != tag:
+        return False
+    for test in tests:
+        if test[0] == 'class':
+            if test[1] not in node.attrs.get('class', "").split():
+                return False
+        elif test[0] == 'attr':
+            if not _attr_matches(node.attrs.get(test[1]), test[2], test[3]):
+                return False
+        elif test[1] not in " ".join(node.text().split()).lower():
+            return False
+    return True
+
+def _complex_matches(node, steps, i=None):
+    i = len(steps) - 1 if i is None else i
+    combinator, compound = steps[i]
+    if not _compound_matches(node, compound):
+        return False
+    if i == 0:
+        return True
+    parent = node.parent
+    if combinator == '>':
+        return parent is not None and parent.tag is not None and _complex_matches(parent, steps, i - 1)
+    while parent is not None and parent.tag is not None:
+        if _complex_matches(parent, steps, i - 1):
+            return True
+        parent = parent.parent
+    return False
+
+class OfflineLocator:
+    """Read-only stand-in for a Playwright Locator over a parsed snapshot."""
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    @property
+    def first(self):
+        return OfflineLocator(self.nodes[:1])
+
+    @property
+    def last(self):
+        return OfflineLocator(self.nodes[-1:])
+
+    def nth(self, index):
+        return OfflineLocator(self.nodes[index:index + 1] if index >= 0 else self.nodes[index:][:1])
+
+    def all(self):
+        return [OfflineLocator([n]) for n in self.nodes]
+
+    def count(self):
+        return len(self.nodes)
+
+    def locator(self, selector):
+        return OfflineLocator(_query(self.nodes, selector))
+
+    def or_(self, other):
+        merged = {id(n): n for n in self.nodes + other.nodes}
+        return OfflineLocator(sorted(merged.values(), key=lambda n: n.order))
+
+    def text_content(self, timeout=None):
+        return self.nodes[0].text() if self.nodes else None
+
+    def all_text_contents(self):
+        return [n.text() for n in self.nodes]
+
+    def get_attribute(self, name, timeout=None):
+        return self.nodes[0].attrs.get(name) if self.nodes else None
+
+    def is_visible(self, timeout=None):
+        # No layout in a snapshot; an archived element counts as visible
+        return bool(self.nodes)
+
+    def wait_for(self, state=None, timeout=None):
+        if not self.nodes:
+            raise TimeoutError("Element not present in snapshot")
+
+class OfflinePage:
+    """Minimal read-only Page over archived HTML, so the live extraction code can run without a browser."""
+    def __init__(self, html_content, url=""):
+        builder = _TreeBuilder()
+        builder.feed(html_content or "")
+        builder.close()
+        self.root = builder.root
+        self.html = html_content or ""
+        self.url = url or ""
+
+    def content(self):
+        return self.html
+
+    def locator(self, selector):
+        return OfflineLocator(_query([self.root], selector))
+
+    def text_content(self, selector, timeout=None):
+        return self.locator(selector).text_content()
+
+    def wait_for_selector(self, selector, timeout=None, state=None):
+        if self.locator(selector).count() == 0:
+            raise TimeoutError(f"Selector not present in snapshot: {selector}")
+
+    def wait_for_load_state(self, state=None, timeout=None):
+        pass
+
+def _query(scopes, selector):
+    """Descendants of scopes matching selector, in document order. Unsupported selectors match nothing."""
+    try:
+        parsed = parse_selector(selector)
+    except UnsupportedSelector:
+        return []
+    found = {}
+    for scope in scopes:
+        for node in scope.descendants():
+            if id(node) not in found and any(_complex_matches(node, steps) for steps in parsed):
+                found[id(node)] = node
+    return sorted(found.values(), key=lambda n: n.order)
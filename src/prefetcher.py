@@ -0,0 +1,81 @@
+import os
+from urllib.parse import quote_plus
+from src.logger_handler import setup_logger
+from src.utils import load_selectors, is_place_url
+
+logger = setup_logger()
+
+class PlacePrefetcher:
+    """Loads the next place's search page in a second tab of the same context while the current place is scraped."""
+    def __init__(self, browser_mgr, gmaps_url, enabled=None):
+        self.browser_mgr = browser_mgr
+        self.gmaps_url = gmaps_url.rstrip('/')
+        self.enabled = enabled if enabled is not None else os.getenv("PREFETCH_NEXT", "false").lower() == "true"
+        self.search_selectors = load_selectors().get('search', {})
+        self._pending = None
+
+    def search_url(self, place_name):
+        return f"{self.gmaps_url}/search/{quote_plus(place_name)}"
+
+    def prefetch(self, place_name, next_context=False):
+        """Starts loading place_name in a background tab; returns immediately once navigation is committed.
+
+        With next_context the tab is opened in the context the worker switches to after the current place.
+        """
+        if not self.enabled:
+            return
+        self.discard()
+        try:
+            context = self.browser_mgr.prepare_next_context() if next_context else self.browser_mgr.context
+            page = self.browser_mgr.new_page(context)
+            # "commit" returns as soon as the response starts; the browser keeps loading while we scroll reviews
+            page.goto(self.search_url(place_name), wait_until="commit")
+            self._pending = (place_name, page, context)
+            logger.debug("Prefetching %s", place_name)
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {place_name}: {e}")
+
+    def advance(self):
+        """Opens the first search result in the prefetched tab so its detail panel loads before take(). Never waits for it."""
+        if not self._pending:
+            return
+        page = self._pending[1]
+        try:
+            if page.is_closed() or is_place_url(page.url):
+                return
+            link = page.locator(f"{self.search_selectors['recommendation_item']} {self.search_selectors['recommendation_link']}")
+            if link.count() > 0:
+                link.first.click(no_wait_after=True, timeout=5000)
+                logger.debug("Prefetch opened the first result for %s", self._pending[0])
+        except Exception as e:
+            logger.debug("Prefetch could not open a result for %s: %s", self._pending[0], e)
+
+    def take(self, place_name):
+        """Swaps the prefetched tab in as the worker's page. Returns it, or None if there is nothing usable."""
+        if not self._pending:
+            return None
+        pending_name, page, context = self._pending
+        self._pending = None
+        # A context switch or memory recycle since prefetch() invalidates the tab
+        if pending_name != place_name or context is not self.browser_mgr.context or page.is_closed():
+            self._close(page)
+            return None
+        
+        old_page = self.browser_mgr.page
+        self.browser_mgr.page = page
+        page.bring_to_front()
+        self._close(old_page)
+        return page
+
+    def discard(self):
+        if self._pending:
+            self._close(self._pending[1])
+            self._pending = None
+
+    @staticmethod
+    def _close(page):
+        try:
+            if page and not page.is_closed():
+                page.close()
+        except Exception:
+            pass
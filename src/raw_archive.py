@@ -0,0 +1,53 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from src.logger_handler import setup_logger
+
+logger = setup_logger()
+
+class RawArchive:
+    """Gzipped per-place snapshots of the detail panel and review item HTML, for offline re-extraction."""
+    def __init__(self, archive_dir=None, enabled=None):
+        self.enabled = enabled if enabled is not None else os.getenv("RAW_ARCHIVE", "false").lower() == "true"
+        self.archive_dir = archive_dir or os.getenv("RAW_ARCHIVE_DIR", "raw_archive")
+
+    def save(self, place_name, details, detail_html, review_html, archived_at=None):
+        """Writes one place's artifacts; returns the archive path.
+
+        archived_at is when the HTML was captured (defaults to now); relative review dates are resolved against it.
+        """
+        if not self.enabled or not detail_html:
+            return None
+        try:
+            if not os.path.exists(self.archive_dir):
+                os.makedirs(self.archive_dir)
+            slug = re.sub(r'[^A-Za-z0-9]+', '_', place_name or "place").strip('_')[:60]
+            timestamp = (archived_at or datetime.now()).strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(self.archive_dir, f"{timestamp}_{slug}.json.gz")
+            payload = {
+                'nama_tempat': place_name,
+                'place_id': details.get('place_id'),
+                'place_url': details.get('place_url'),
+                'archived_at': timestamp,
+                'detail_html': detail_html,
+                'review_html': review_html or []
+            }
+            with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(payload, f, ensure_ascii=False)
+            return path
+        except Exception as e:
+            logger.warning(f"Could not archive raw HTML for {place_name}: {e}")
+            return None
+
+    def paths(self):
+        """Archive files, oldest first."""
+        if not os.path.exists(self.archive_dir):
+            return []
+        return sorted(os.path.join(self.archive_dir, f) for f in os.listdir(self.archive_dir) if f.endswith(".json.gz"))
+
+    @staticmethod
+    def load(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
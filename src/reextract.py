@@ -0,0 +1,78 @@
+import os
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from src.raw_archive import RawArchive
+from src.offline_page import OfflinePage
+from src.data_processor import DataProcessor
+from src.logger_handler import setup_logger, forward_worker_logs, init_worker_logging, log_context
+
+logger = setup_logger()
+
+# One scraper (selectors.json and selector stats read once) per worker process
+_scraper = None
+
+def _worker_scraper():
+    global _scraper
+    if _scraper is None:
+        from src.google_maps_scraper import GoogleMapsScraper
+        _scraper = GoogleMapsScraper(None)
+    return _scraper
+
+def _init_worker(log_queue):
+    init_worker_logging(log_queue, worker=f"reextract-{os.getpid()}")
+    _worker_scraper()
+
+def extract_archive(path):
+    """Runs the scraper's extraction logic on one archive file. Executed in worker processes."""
+    snapshot = RawArchive.load(path)
+    name = snapshot.get('nama_tempat')
+    log_context(place=name, stage="reextract")
+    # Same selectors and field rules as a live scrape, run against the archived DOM
+    scraper = _worker_scraper()
+    scraper.page = OfflinePage(snapshot['detail_html'], snapshot.get('place_url'))
+    details = scraper.get_place_details(name, {'place_id': snapshot.get('place_id')})
+    items = OfflinePage("".join(snapshot.get('review_html', []))).locator(scraper.selectors['reviews']['item']).all()
+    raw_reviews = [scraper.extract_review_item(item, details['place_id'], name, details['place_url']) for item in items]
+    # Relative review dates ("2 minggu lalu") are relative to when the page was archived, not to now
+    archived_at = datetime.strptime(snapshot['archived_at'], "%Y%m%d_%H%M%S") if snapshot.get('archived_at') else None
+    return name, details, raw_reviews, archived_at
+
+def reextract(archive_dir=None, workers=None, output_mode=None):
+    """Re-extracts every archived place in parallel and exports it like a live scrape, without a browser."""
+    archive = RawArchive(archive_dir, enabled=True)
+    paths = archive.paths()
+    if not paths:
+        logger.warning(f"No raw archives found in {archive.archive_dir}")
+        return
+    
+    workers = workers or int(os.getenv("REEXTRACT_WORKERS") or os.cpu_count() or 1)
+    output_mode = (output_mode or os.getenv("OUTPUT_MODE", "denormalized")).lower()
+    processor = DataProcessor(os.getenv("OUTPUT_FOLDER", "output_data"))
+    logger.info(f"Re-extracting {len(paths)} archived places with {workers} workers.")
+    
+    errors = []
+    # Worker records are sent back to this process's log; a forked worker has no listener thread of its own
+    log_queue, log_listener = forward_worker_logs()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log_queue,)) as pool:
+            for path, result in zip(paths, pool.map(_safe_extract, paths, chunksize=8)):
+                if isinstance(result, str):
+                    errors.append({"place_name": path, "error": result})
+                    continue
+                name, details, raw_reviews, archived_at = result
+                if output_mode == "normalized":
+                    place_row, records = processor.process_reviews_normalized(raw_reviews, details, archived_at)
+                    processor.export_normalized(place_row, records, name_prefix="gmaps_reextract")
+                else:
+                    processor.export_to_csv(processor.process_reviews(raw_reviews, details, archived_at), name_prefix="gmaps_reextract")
+    finally:
+        log_listener.stop()
+    
+    processor.export_errors(errors)
+    logger.info(f"Re-extraction completed: {len(paths) - len(errors)} places, {len(errors)} errors.")
+
+def _safe_extract(path):
+    try:
+        return extract_archive(path)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
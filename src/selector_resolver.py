@@ -0,0 +1,97 @@
+import os
+import time
+from src.logger_handler import setup_logger
+from src.utils import load_json, save_json
+
+logger = setup_logger()
+
+class SelectorResolver:
+    """Tries selector variants best-first, based on hit/miss and latency stats persisted across runs.
+
+    Catch-all fallbacks (e.g. div[role='main']) always match, so they are never ranked: they are only tried
+    after every specific variant has failed.
+    """
+    def __init__(self, stats_file=None, alert_after=None, decay=None, retry_every=None):
+        self.stats_file = stats_file or os.getenv("SELECTOR_STATS_FILE", "cache/selector_stats.json")
+        self.alert_after = alert_after or int(os.getenv("SELECTOR_ALERT_AFTER", "3"))
+        # Old attempts fade out, so a variant that missed during a bad spell can climb back up
+        self.decay = decay if decay is not None else float(os.getenv("SELECTOR_STATS_DECAY", "0.95"))
+        # Every Nth lookup of a field uses the configured order, re-trying variants that ranked down (0 disables)
+        self.retry_every = retry_every if retry_every is not None else int(os.getenv("SELECTOR_RETRY_EVERY", "10"))
+        self.stats = self._load()
+        self.consecutive_failures = {}
+        self.lookups = {}
+
+    def _load(self):
+        return load_json(self.stats_file, {}, "selector stats")
+
+    def save(self):
+        """Writes the accumulated stats back to disk."""
+        save_json(self.stats_file, self.stats, "selector stats")
+
+    def _score(self, field, variant):
+        s = self.stats.get(field, {}).get(variant)
+        if not s:
+            # Untried variants rank as a coin flip so a newly added selector still gets a chance
+            return (0.5, 0.0)
+        attempts = s['hits'] + s['misses']
+        hit_rate = (s['hits'] + 1) / (attempts + 2)
+        if s['hits'] > 0 and s['misses'] < 0.5:
+            # No recent misses: as good as any other healthy variant, latency decides
+            hit_rate = 1.0
+        avg_ms = s['total_ms'] / attempts if attempts else 0.0
+        return (hit_rate, -avg_ms)
+
+    def order(self, field, variants, fallbacks=()):
+        """Returns the variants sorted best-first (ties keep the configured order), then the fallbacks as given."""
+        variants = [v for v in variants if v]
+        lookups = self.lookups.get(field, 0) + 1
+        self.lookups[field] = lookups
+        if not (self.retry_every and lookups % self.retry_every == 0):
+            variants = sorted(variants, key=lambda v: self._score(field, v), reverse=True)
+        return variants + [v for v in fallbacks if v and v not in variants]
+
+    def _record(self, field, variant, hit, elapsed_ms):
+        s = self.stats.setdefault(field, {}).setdefault(variant, {'hits': 0, 'misses': 0, 'total_ms': 0.0})
+        s['hits' if hit else 'misses'] += 1
+        s['total_ms'] += elapsed_ms
+
+    def wait_for_any(self, page, field, variants, timeout, fallbacks=()):
+        """Waits until any variant matches, so a dead primary no longer costs the full timeout."""
+        combined = None
+        for variant in self.order(field, variants, fallbacks):
+            loc = page.locator(variant)
+            combined = loc if combined is None else combined.or_(loc)
+        if combined is None:
+            return False
+        try:
+            combined.first.wait_for(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def resolve(self, page, field, variants, visible=False, required=False, fallbacks=()):
+        """Returns (locator, variant) for the first variant that matches, or (None, None)."""
+        # Age every variant of the field once per lookup, tried or not, so old misses fade out
+        for s in self.stats.get(field, {}).values():
+            for key in ('hits', 'misses', 'total_ms'):
+                s[key] *= self.decay
+        for variant in self.order(field, variants, fallbacks):
+            started = time.perf_counter()
+            try:
+                loc = page.locator(variant)
+                hit = loc.count() > 0 and (not visible or loc.first.is_visible())
+            except Exception as e:
+                logger.debug("Selector variant %s for %s raised: %s", variant, field, e)
+                hit = False
+            self._record(field, variant, hit, (time.perf_counter() - started) * 1000)
+            if hit:
+                self.consecutive_failures[field] = 0
+                return loc, variant
+
+        if required:
+            failures = self.consecutive_failures.get(field, 0) + 1
+            self.consecutive_failures[field] = failures
+            if failures >= self.alert_after:
+                logger.error(f"SELECTOR ALERT: every variant for '{field}' failed on the last {failures} places. Check config/selectors.json.")
+        return None, None
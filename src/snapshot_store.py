@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from src.logger_handler import setup_logger
+from src.utils import load_json, save_json
+
+logger = setup_logger()
+
+# Detail fields that identify a place's state; URL params, image URLs and opening-hours text vary between visits
+SNAPSHOT_FIELDS = [
+    'actual_name', 'rating_total', 'ulasan_total', 'alamat', 'website', 'telepon', 'description',
+    'main_category', 'categories', 'is_temporarily_closed', 'is_permanently_closed'
+]
+
+class SnapshotStore:
+    """Per-place snapshot of detail fields and review count, used to skip review scraping on refresh runs."""
+    def __init__(self, snapshot_file=None):
+        self.snapshot_file = snapshot_file or os.getenv("SNAPSHOT_FILE", "cache/place_snapshots.json")
+        self.snapshots = self._load()
+
+    def _load(self):
+        return load_json(self.snapshot_file, {}, "snapshots")
+
+    def save(self):
+        save_json(self.snapshot_file, self.snapshots, "snapshots")
+
+    @staticmethod
+    def _key(details):
+        return details.get('place_id') or details.get('nama_tempat')
+
+    @staticmethod
+    def _normalize_count(value):
+        digits = "".join(filter(str.isdigit, str(value))) if value is not None else ""
+        return int(digits) if digits else None
+
+    @staticmethod
+    def fingerprint(details):
+        """Stable hash of the snapshot fields."""
+        payload = {f: details.get(f) for f in SNAPSHOT_FIELDS}
+        payload['ulasan_total'] = SnapshotStore._normalize_count(payload['ulasan_total'])
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def is_unchanged(self, details):
+        """True when the stored review count and detail hash both match the freshly read details."""
+        snapshot = self.snapshots.get(self._key(details))
+        if not snapshot:
+            return False
+        count = self._normalize_count(details.get('ulasan_total'))
+        # An unreadable count is never trusted as "unchanged"
+        if count is None or snapshot.get('review_count') != count:
+            return False
+        return snapshot.get('hash') == self.fingerprint(details)
+
+    def update(self, details, latest_review_id=None):
+        """Records the state after a successful review scrape."""
+        self.snapshots[self._key(details)] = {
+            'hash': self.fingerprint(details),
+            'review_count': self._normalize_count(details.get('ulasan_total')),
+            'latest_review_id': latest_review_id,
+            'scraped_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
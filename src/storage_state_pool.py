@@ -0,0 +1,53 @@
+import os
+import random
+import time
+from src.logger_handler import setup_logger
+
+logger = setup_logger()
+
+class StorageStatePool:
+    """Rotating set of saved storage_state profiles (cookies + localStorage) that new contexts start from."""
+    def __init__(self, state_dir=None, size=None, max_age_hours=None, enabled=None):
+        self.enabled = enabled if enabled is not None else os.getenv("STORAGE_STATE_POOL", "false").lower() == "true"
+        self.state_dir = state_dir or os.getenv("STORAGE_STATE_DIR", "cache/storage_states")
+        self.size = size or int(os.getenv("STORAGE_STATE_POOL_SIZE", "4"))
+        self.max_age = (max_age_hours or float(os.getenv("STORAGE_STATE_MAX_AGE_H", "24"))) * 3600
+
+    def _slots(self):
+        return [os.path.join(self.state_dir, f"state_{i}.json") for i in range(self.size)]
+
+    def _age(self, path):
+        return time.time() - os.path.getmtime(path) if os.path.exists(path) else None
+
+    def pick(self):
+        """Path of a random non-expired profile, or None to start the context cookie-less."""
+        if not self.enabled:
+            return None
+        fresh = [p for p in self._slots() if self._age(p) is not None and self._age(p) < self.max_age]
+        return random.choice(fresh) if fresh else None
+
+    def harvest(self, context):
+        """Saves a warmed-up context into the stalest slot before it is closed.
+
+        Contexts are recycled every couple of places anyway, so the pool keeps itself refreshed from live
+        sessions without any extra navigation.
+        """
+        if not self.enabled or not context:
+            return None
+        try:
+            # Only sessions that got past consent and loaded Maps carry Google cookies worth keeping
+            if not context.cookies("https://www.google.com"):
+                return None
+            slots = self._slots()
+            # Missing slots first, then the oldest one
+            slot = min(slots, key=lambda p: (os.path.exists(p), -(self._age(p) or 0)))
+            if not os.path.exists(self.state_dir):
+                os.makedirs(self.state_dir)
+            tmp_path = slot + ".part"
+            context.storage_state(path=tmp_path)
+            os.replace(tmp_path, slot)
+            logger.debug("Storage state saved to %s", slot)
+            return slot
+        except Exception as e:
+            logger.warning(f"Could not save storage state: {e}")
+            return None
@@ -0,0 +1,69 @@
+import os
+import re
+import time
+from datetime import datetime
+from src.logger_handler import setup_logger
+
+logger = setup_logger()
+
+class TailTracer:
+    """Records a Playwright trace for every place but only keeps it when the place was slow or failed."""
+    def __init__(self, trace_dir=None, slow_seconds=None, max_mb=None, enabled=None):
+        self.enabled = enabled if enabled is not None else os.getenv("TAIL_TRACING", "false").lower() == "true"
+        self.trace_dir = trace_dir or os.getenv("TRACE_DIR", "traces")
+        self.slow_seconds = slow_seconds or float(os.getenv("TRACE_SLOW_SECONDS", "300"))
+        self.max_bytes = (max_mb or float(os.getenv("TRACE_MAX_MB", "500"))) * 1024 * 1024
+        self._context = None
+        self._place = None
+        self._started = None
+
+    def start(self, context, place_name):
+        """Starts in-memory tracing (screenshots + DOM snapshots) for one place."""
+        if not self.enabled:
+            return
+        self.stop()
+        try:
+            context.tracing.start(screenshots=True, snapshots=True)
+            self._context = context
+            self._place = place_name
+            self._started = time.perf_counter()
+        except Exception as e:
+            logger.warning(f"Could not start tracing for {place_name}: {e}")
+
+    def stop(self, error=None):
+        """Writes the trace to disk if the place failed or exceeded the latency threshold, otherwise drops it."""
+        if not self._context:
+            return None
+        context, place_name = self._context, self._place
+        elapsed = time.perf_counter() - self._started
+        self._context = self._place = self._started = None
+        
+        reason = "error" if error else ("slow" if elapsed > self.slow_seconds else None)
+        try:
+            if not reason:
+                # No path: Playwright discards the buffered trace
+                context.tracing.stop()
+                return None
+            
+            if not os.path.exists(self.trace_dir):
+                os.makedirs(self.trace_dir)
+            slug = re.sub(r'[^A-Za-z0-9]+', '_', place_name or "place").strip('_')[:60]
+            path = os.path.join(self.trace_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{slug}_{reason}.zip")
+            context.tracing.stop(path=path)
+            logger.warning(f"Kept trace for {place_name} ({reason}, {elapsed:.1f}s): {path}")
+            self._enforce_cap()
+            return path
+        except Exception as e:
+            logger.warning(f"Could not stop tracing for {place_name}: {e}")
+            return None
+
+    def _enforce_cap(self):
+        """Deletes the oldest kept traces until the directory fits TRACE_MAX_MB."""
+        traces = [os.path.join(self.trace_dir, f) for f in os.listdir(self.trace_dir) if f.endswith(".zip")]
+        traces.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(t) for t in traces)
+        while traces and total > self.max_bytes:
+            oldest = traces.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+            logger.info(f"Trace disk cap reached; removed {oldest}")
@@ -5,21 +5,27 @@ import json
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+from src.logger_handler import setup_logger
 
 load_dotenv()
 
+logger = setup_logger()
+
 def random_delay(min_val=None, max_val=None):
     """Wait for a random duration."""
     min_d = float(os.getenv("MIN_DELAY", 2)) if min_val is None else min_val
     max_d = float(os.getenv("MAX_DELAY", 5)) if max_val is None else max_val
     time.sleep(random.uniform(min_d, max_d))
 
-def parse_relative_date(date_str):
-    """Convert relative date strings (e.g., '15 jam lalu', '3 minggu lalu') to YYYY-MM-DD."""
+def parse_relative_date(date_str, now=None):
+    """Convert relative date strings (e.g., '15 jam lalu', '3 minggu lalu') to YYYY-MM-DD.
+
+    `now` is the moment the string was scraped; defaults to the current time.
+    """
     if not date_str:
         return None
         
-    now = datetime.now()
+    now = now or datetime.now()
     date_str = date_str.lower()
     
     # Handle 'Baru'
@@ -63,6 +69,10 @@ def extract_place_id_from_url(url):
         
     return None
 
+def is_place_url(url):
+    """True when a Maps URL points at a single place rather than a search."""
+    return "!1s" in url or "ChIJ" in url
+
 def extract_lat_long_from_url(url):
     """Extract Latitude and Longitude from Google Maps URL."""
     # Pattern: /@(-?\d+\.\d+),(-?\d+\.\d+)
@@ -80,3 +90,26 @@ def load_selectors(file_path="config/selectors.json"):
     except Exception as e:
         print(f"Error loading selectors: {e}")
         return {}
+
+def load_json(file_path, default=None, label="JSON file"):
+    """Reads a JSON cache file; returns default when it is missing or unreadable."""
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read {label} {file_path}: {e}")
+    return default
+
+def save_json(file_path, data, label="JSON file"):
+    """Writes data as JSON, creating the parent folder if needed. Returns True on success."""
+    try:
+        folder = os.path.dirname(file_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not write {label} {file_path}: {e}")
+        return False